@@ -1,10 +1,15 @@
 """FastAPI app for alarm_his only. List + Get + Create."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from alarm_his.router import router
 
 app = FastAPI(title="edge-hmi alarm_his API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "alarm_his")
 
 
 @app.get("/")
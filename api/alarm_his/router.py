@@ -1,13 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from shared.deps import get_db
+from shared.export import EXPORT_RESPONSES, ExportFormat, export_response
 from shared.models import AlarmHis as AlarmHisModel
 
 from alarm_his.schemas import AlarmHisRead
 
 router = APIRouter(prefix="/alarm_his", tags=["alarm_his"])
 
+_FIELDS = ("id", "time", "equip_id", "alarm_def_id", "trigger_val", "alarm_type")
+
+
+def _filter(q, equip_id: int | None):
+    """Shared by list_ (Query) and export (Select)."""
+    if equip_id is not None:
+        q = q.filter(AlarmHisModel.equip_id == equip_id)
+    return q
+
 
 @router.get("", response_model=list[AlarmHisRead])
 def list_(
@@ -16,12 +28,17 @@ def list_(
     limit: int = Query(100, le=500),
     equip_id: int | None = None,
 ):
-    q = db.query(AlarmHisModel)
-    if equip_id is not None:
-        q = q.filter(AlarmHisModel.equip_id == equip_id)
+    q = _filter(db.query(AlarmHisModel), equip_id)
     return q.order_by(AlarmHisModel.id).offset(skip).limit(limit).all()
 
 
+@router.get("/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export(format: ExportFormat = "csv", equip_id: int | None = None):
+    """Stream all matching rows as CSV or NDJSON (no row limit), ordered by id."""
+    stmt = _filter(select(*(getattr(AlarmHisModel, f) for f in _FIELDS)), equip_id)
+    return export_response(stmt.order_by(AlarmHisModel.id), _FIELDS, format, "alarm_his")
+
+
 @router.get("/{id}", response_model=AlarmHisRead)
 def get(id: int, db: Session = Depends(get_db)):
     row = db.get(AlarmHisModel, id)
@@ -0,0 +1 @@
+"""pytest root for api/: puts this directory on sys.path so tests import packages as the services do."""
@@ -1,7 +1,12 @@
 """FastAPI app for defect_code_mst only. Defect reason code definition."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from defect_code_mst.router import router
 
 app = FastAPI(title="edge-hmi defect_code_mst API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "defect_code_mst")
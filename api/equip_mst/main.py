@@ -1,10 +1,15 @@
 """FastAPI app for equip_mst only. Single-table container."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from equip_mst.router import router
 
 app = FastAPI(title="edge-hmi equip_mst API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "equip_mst")
 
 
 @app.get("/")
@@ -0,0 +1,173 @@
+"""POST /batch: fan out many table sub-requests concurrently, one combined response.
+
+Each item targets a table path (e.g. ``/measurement?sensor_id=3&limit=100``).
+Items run concurrently (bounded by BATCH_MAX_CONCURRENCY) against the pooled
+upstream clients, or in-process in monolith mode. Every item gets its own status;
+one failing item never fails the batch. Item bodies are buffered, so streaming paths
+(STREAM_PATH_SUFFIXES, e.g. /export) are rejected and bodies over BATCH_MAX_ITEM_BYTES get 413.
+Items are fetched uncompressed (Accept-Encoding: identity): they are decoded and re-embedded
+as JSON here anyway. The batch payload itself is capped at BATCH_MAX_REQUEST_BYTES before it is read.
+"""
+import asyncio
+import json
+from typing import Any, Literal
+
+import httpx
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from hmi_api.breaker import breakers
+from hmi_api.config import TABLE_SERVICES, settings
+from hmi_api.proxy import BREAKER_ERRORS, get_client, is_stream_path, send_upstream
+
+router = APIRouter(tags=["gateway"])
+
+# Monolith mode: sub-requests dispatched in-process through the gateway app itself.
+_local_client: httpx.AsyncClient | None = None
+
+
+class BatchItem(BaseModel):
+    id: str | None = None
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str
+    params: dict[str, Any] | None = None
+    body: Any = None
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem]
+
+
+class BatchItemResult(BaseModel):
+    id: str | None = None
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: list[BatchItemResult]
+
+
+def _service_of(path: str) -> str | None:
+    svc = path.lstrip("/").split("?", 1)[0].split("/", 1)[0]
+    return svc if svc in TABLE_SERVICES else None
+
+
+def _client_for(service: str, request: Request) -> httpx.AsyncClient:
+    global _local_client
+    if not settings.monolith:
+        return get_client(service)
+    if _local_client is None:
+        _local_client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=request.app, raise_app_exceptions=False),
+            base_url="http://hmi-api",
+            timeout=settings.UPSTREAM_TIMEOUT,
+        )
+    return _local_client
+
+
+async def close_local_client() -> None:
+    global _local_client
+    if _local_client is not None:
+        await _local_client.aclose()
+        _local_client = None
+
+
+async def _read_capped(r: httpx.Response, limit: int) -> bytes | None:
+    """Decoded body, or None once it exceeds limit bytes (the rest is not read)."""
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in r.aiter_bytes():
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _read_request_capped(request: Request, limit: int) -> bytes:
+    """Request body; 413 from Content-Length before reading, or as soon as a chunked body passes limit."""
+    detail = f"Batch payload exceeds {limit} bytes"
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > limit:
+        raise HTTPException(413, detail)
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(413, detail)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _decode_body(r: httpx.Response, content: bytes) -> Any:
+    """JSON body if declared and parseable, else text (e.g. an HTML 502 page from a proxy)."""
+    if not content:
+        return None
+    if "json" in r.headers.get("content-type", ""):
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass
+    return content.decode(r.encoding or "utf-8", errors="replace")
+
+
+async def _run_item(item: BatchItem, request: Request, sem: asyncio.Semaphore) -> BatchItemResult:
+    service = _service_of(item.path)
+    if service is None:
+        return BatchItemResult(id=item.id, status=404, body={"detail": f"Unknown table path: {item.path}"})
+    path = "/" + item.path.lstrip("/")
+    if is_stream_path(path):
+        return BatchItemResult(id=item.id, status=400, body={"detail": f"Streaming path not allowed in /batch: {item.path}"})
+    breaker = None if settings.monolith else breakers[service]
+    if breaker is not None and not breaker.allow():
+        return BatchItemResult(id=item.id, status=503, body={"detail": f"Table API '{service}' is unavailable (circuit open). Retry later."})
+    async with sem:
+        try:
+            client = _client_for(service, request)
+            req = client.build_request(
+                item.method,
+                path,
+                params=item.params,
+                json=item.body if item.method in ("POST", "PUT", "PATCH") else None,
+                headers={"Accept-Encoding": "identity"},
+            )
+            r = await send_upstream(service, client, req)
+            try:
+                content = await _read_capped(r, settings.BATCH_MAX_ITEM_BYTES)
+            finally:
+                await r.aclose()
+        except httpx.HTTPError as e:
+            if breaker is not None and isinstance(e, BREAKER_ERRORS):
+                breaker.record_failure()
+            if isinstance(e, httpx.ReadTimeout):
+                return BatchItemResult(id=item.id, status=504, body={"detail": f"Table API '{service}' timed out", "error": str(e)})
+            return BatchItemResult(
+                id=item.id,
+                status=503,
+                body={"detail": f"Table API '{service}' is not reachable. Is the container running?", "error": str(e)},
+            )
+    if breaker is not None:
+        breaker.record_response(r.status_code)
+    if content is None:
+        return BatchItemResult(
+            id=item.id, status=413, body={"detail": f"Item response exceeds {settings.BATCH_MAX_ITEM_BYTES} bytes"}
+        )
+    return BatchItemResult(id=item.id, status=r.status_code, body=_decode_body(r, content))
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(request: Request):
+    """여러 테이블 조회를 한 번에 (동시 실행, 항목별 status)."""
+    raw = await _read_request_capped(request, settings.BATCH_MAX_REQUEST_BYTES)
+    try:
+        payload = BatchRequest.model_validate_json(raw)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False, include_input=False))
+    if len(payload.requests) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"Batch exceeds {settings.BATCH_MAX_ITEMS} requests")
+    sem = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    results = await asyncio.gather(*(_run_item(item, request, sem) for item in payload.requests))
+    return BatchResponse(responses=list(results))
@@ -0,0 +1,110 @@
+"""Per-service circuit breaker for table services (fed by proxy results and the /health prober).
+
+closed    → requests pass; BREAKER_FAILURE_THRESHOLD consecutive failures → open
+open      → requests fail fast (503) for BREAKER_RESET_TIMEOUT seconds
+half_open → one trial request (or a successful /health probe) closes it; a failure re-opens
+
+Failures are connect errors and 5xx replies only; a slow query (read timeout) says nothing about
+the service being down. /health probes keep their own counter: a good probe never resets the
+request failure count of a closed breaker, it only closes one whose reset timeout has passed.
+"""
+import logging
+import time
+from typing import Any
+
+from hmi_api.config import TABLE_SERVICES, settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_failures = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self.last_probe_ok: bool | None = None
+        self.last_probe_at: float | None = None
+
+    def allow(self) -> bool:
+        """May a request go upstream now?"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < settings.BREAKER_RESET_TIMEOUT:
+                return False
+            self.state = HALF_OPEN
+        # half_open: one trial at a time; retry a trial that never reported back
+        if now - self._trial_at < settings.BREAKER_RESET_TIMEOUT:
+            return False
+        self._trial_at = now
+        return True
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("circuit %s closed", self.service)
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_at = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= settings.BREAKER_FAILURE_THRESHOLD:
+            self._open(f"{self.failures} failure(s)")
+
+    def record_response(self, status_code: int) -> None:
+        """Upstream replied: 5xx is a failure, anything else a success."""
+        if status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_probe(self, ok: bool) -> None:
+        """/health result. Separate from request failures (see module docstring)."""
+        self.last_probe_ok = ok
+        self.last_probe_at = time.monotonic()
+        if ok:
+            self.probe_failures = 0
+            reset_due = time.monotonic() - self._opened_at >= settings.BREAKER_RESET_TIMEOUT
+            if self.state == HALF_OPEN or (self.state == OPEN and reset_due):
+                self.record_success()
+            return
+        self.probe_failures += 1
+        if self.state == HALF_OPEN or self.probe_failures >= settings.BREAKER_FAILURE_THRESHOLD:
+            self._open(f"{self.probe_failures} failed /health probe(s)")
+
+    def _open(self, reason: str) -> None:
+        if self.state != OPEN:
+            logger.warning("circuit %s open after %s", self.service, reason)
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_at = 0.0
+
+    def retry_after(self) -> int:
+        remaining = settings.BREAKER_RESET_TIMEOUT - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "probe_failures": self.probe_failures,
+            "last_probe_ok": self.last_probe_ok,
+            "last_probe_age_sec": (
+                round(time.monotonic() - self.last_probe_at, 1) if self.last_probe_at is not None else None
+            ),
+        }
+
+
+breakers: dict[str, CircuitBreaker] = {svc: CircuitBreaker(svc) for svc in TABLE_SERVICES}
+
+
+def breaker_status() -> dict[str, dict[str, Any]]:
+    return {svc: b.status() for svc, b in breakers.items()}
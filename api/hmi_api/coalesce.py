@@ -0,0 +1,42 @@
+"""Single-flight: identical in-flight GETs share one upstream call."""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """Run fn once per key while in flight; concurrent callers with the same key await the same result.
+
+    The upstream call runs in its own task, so a disconnecting leader does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.upstream_calls = 0
+        self.deduplicated = 0
+        self.oversize = 0  # waiters that fell back to their own call (result too large to share)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.upstream_calls += 1
+        else:
+            self.deduplicated += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "deduplicated": self.deduplicated,
+            "oversize": self.oversize,
+            "inflight": len(self._inflight),
+        }
@@ -1,4 +1,6 @@
 """Gateway config. Table services = compose service names (DNS)."""
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 APP_VERSION = "1.0.5"
@@ -28,10 +30,52 @@ TABLE_SERVICES = [
 
 class Settings(BaseSettings):
     """Override via env if table services run elsewhere."""
+    # proxy = HTTP hop to table containers; monolith = mount <table>.router in-process (shared DB engine)
+    GATEWAY_MODE: Literal["proxy", "monolith"] = "proxy"
     TABLE_SERVICE_PORT: int = 8000
 
+    # Upstream HTTP client pool (one long-lived client per table service)
+    UPSTREAM_MAX_CONNECTIONS: int = 20
+    UPSTREAM_MAX_KEEPALIVE: int = 10
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_TIMEOUT: float = 30.0
+    UPSTREAM_CONNECT_TIMEOUT: float = 5.0
+    UPSTREAM_POOL_TIMEOUT: float = 5.0
+    # Per-service max connections override, JSON env e.g. {"measurement": 50}
+    UPSTREAM_SERVICE_MAX_CONNECTIONS: dict[str, int] = {}
+    # Stream request/response bodies chunk by chunk (False = buffer whole body)
+    PROXY_STREAMING: bool = True
+    # Coalesce identical in-flight GETs into one upstream call (buffered, fanned out to all waiters)
+    COALESCE_GETS: bool = True
+    # Only replies up to this size are shared; larger ones fall back to per-request streaming
+    COALESCE_MAX_BYTES: int = 1024 * 1024
+    COALESCE_KEY_HEADERS: list[str] = ["accept", "accept-encoding", "authorization"]
+    # GET paths always streamed, never coalesced/buffered (unbounded exports)
+    STREAM_PATH_SUFFIXES: list[str] = ["/export"]
+    # Circuit breaker + /health prober per table service
+    BREAKER_FAILURE_THRESHOLD: int = 3
+    BREAKER_RESET_TIMEOUT: float = 10.0
+    HEALTH_PROBE_INTERVAL: float = 5.0
+    HEALTH_PROBE_TIMEOUT: float = 2.0
+    # POST /batch limits
+    BATCH_MAX_ITEMS: int = 50
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_MAX_REQUEST_BYTES: int = 256 * 1024
+    # Per-item response body cap (bytes read from upstream); larger items get status 413
+    BATCH_MAX_ITEM_BYTES: int = 4 * 1024 * 1024
+    # Aggregated /openapi.json cache
+    OPENAPI_CACHE_TTL: float = 60.0
+    OPENAPI_FETCH_TIMEOUT: float = 3.0
+
     def base_url(self, service: str) -> str:
         return f"http://{service}:{self.TABLE_SERVICE_PORT}"
 
+    @property
+    def monolith(self) -> bool:
+        return self.GATEWAY_MODE == "monolith"
+
+    def max_connections(self, service: str) -> int:
+        return self.UPSTREAM_SERVICE_MAX_CONNECTIONS.get(service, self.UPSTREAM_MAX_CONNECTIONS)
+
 
 settings = Settings()
@@ -0,0 +1,49 @@
+"""Background /health prober: feeds each table service's circuit breaker (see breaker.py)."""
+import asyncio
+import logging
+
+from hmi_api.breaker import breakers
+from hmi_api.config import TABLE_SERVICES, settings
+from hmi_api.proxy import get_client
+
+logger = logging.getLogger(__name__)
+
+
+async def _probe(service: str) -> None:
+    try:
+        r = await get_client(service).get("/health", timeout=settings.HEALTH_PROBE_TIMEOUT)
+        ok = r.status_code == 200
+    except Exception:
+        ok = False
+    breakers[service].record_probe(ok)
+
+
+class HealthProber:
+    """Probe every table service's /health concurrently every HEALTH_PROBE_INTERVAL seconds."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.gather(*(_probe(svc) for svc in TABLE_SERVICES))
+            except Exception:
+                logger.exception("health probe failed")
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+health_prober = HealthProber()
@@ -1,12 +1,58 @@
-"""hmi-api: 게이트웨이. Docker-compose 테이블 API 컨테이너(line_mst, equip_mst, …)로 프록시."""
+"""hmi-api: 게이트웨이. Docker-compose 테이블 API 컨테이너(line_mst, equip_mst, …)로 프록시.
+
+GATEWAY_MODE=monolith: 테이블 라우터를 프로세스 내에 직접 mount (HTTP hop 없음, shared.database 엔진 1개).
+"""
+import importlib
+from contextlib import AsyncExitStack, asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
+from hmi_api.batch import close_local_client
+from hmi_api.batch import router as batch_router
+from hmi_api.breaker import breaker_status, breakers
 from hmi_api.config import APP_VERSION, TABLE_SERVICES, settings
-from hmi_api.proxy import fetch_openapi, proxy_to_table
+from hmi_api.health import health_prober
+from hmi_api.metrics import register_gateway_metrics
+from hmi_api.openapi_cache import openapi_cache
+from hmi_api.proxy import close_clients, proxy_to_table, single_flight, start_clients
+
+
+async def _enter_table_lifespans(stack: AsyncExitStack) -> None:
+    """Monolith mode: run each table app's own lifespan (e.g. measurement latest cache, violation scanner)."""
+    for svc in TABLE_SERVICES:
+        module = importlib.import_module(f"{svc}.main")
+        table_lifespan = getattr(module, "lifespan", None)
+        if table_lifespan is not None:
+            await stack.enter_async_context(table_lifespan(module.app))
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """테이블 서비스별 keep-alive 클라이언트 풀 생성/종료, /health 프로브, OpenAPI 캐시 백그라운드 갱신.
+
+    Monolith: 테이블 앱 lifespan을 AsyncExitStack으로 함께 실행 (종료는 역순).
+    """
+    async with AsyncExitStack() as stack:
+        if settings.monolith:
+            await _enter_table_lifespans(stack)
+        else:
+            await start_clients()
+            health_prober.start()
+        openapi_cache.start()
+        try:
+            yield
+        finally:
+            await health_prober.stop()
+            await openapi_cache.stop()
+            await close_local_client()
+            await close_clients()
+
 
 app = FastAPI(
     title="Edge HMI API",
@@ -15,6 +61,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    lifespan=lifespan,
 )
 
 _STATIC = Path(__file__).parent / "static"
@@ -24,6 +71,11 @@ _HTML_PAGES = {
 }
 
 app.mount("/static", StaticFiles(directory=str(_STATIC)), name="static")
+app.include_router(batch_router)
+# Proxied bodies already compressed upstream carry Content-Encoding and pass through untouched.
+app.add_middleware(CompressionMiddleware)
+instrument(app, "hmi_api")
+register_gateway_metrics(single_flight, breakers)
 
 
 @app.get("/")
@@ -52,7 +104,7 @@ async def feature_usage():
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "role": "gateway"}
+    return {"status": "ok", "role": "gateway", "mode": settings.GATEWAY_MODE}
 
 
 @app.get("/info", include_in_schema=False)
@@ -61,11 +113,15 @@ async def service_info():
     return {
         "service": "Edge HMI API Gateway",
         "version": APP_VERSION,
+        "mode": settings.GATEWAY_MODE,
         "status": "running",
         "swagger_ui_url": "/",
         "integrated_api_docs": "/openapi.json",
         "integrated_services_count": len(TABLE_SERVICES),
         "services": list(TABLE_SERVICES),
+        "openapi_cache": openapi_cache.status(),
+        "coalesce": single_flight.stats(),
+        "circuit_breakers": {} if settings.monolith else breaker_status(),
         "available_endpoints": {
             "/": "Swagger UI (main)",
             "/swagger": "Swagger UI (alias)",
@@ -73,50 +129,16 @@ async def service_info():
             "/info": "Service information",
             "/openapi.json": "OpenAPI specification",
             "/health": "Health check",
+            "/batch": "Batch/fan-out of table sub-requests (POST)",
+            "/metrics": "Prometheus metrics",
         },
     }
 
 
 @app.get("/openapi.json")
 async def openapi_aggregated():
-    """각 테이블 서비스 openapi.json 수집 후 병합. (유일한 OpenAPI 소스)"""
-    paths: dict = {}
-    tags: list = []
-    seen_tags: set = set()
-    all_schemas: dict = {}
-    skip_paths = {"/", "/health", "/openapi.json", "/docs", "/redoc"}
-    for svc in TABLE_SERVICES:
-        spec = await fetch_openapi(svc)
-        if not spec:
-            continue
-        comp = spec.get("components") or {}
-        for name, schema in (comp.get("schemas") or {}).items():
-            if name not in all_schemas:
-                all_schemas[name] = schema
-        for path, path_item in (spec.get("paths") or {}).items():
-            if path in skip_paths or not path.startswith(f"/{svc}"):
-                continue
-            paths[path] = path_item
-            for op in (path_item or {}).values():
-                if not isinstance(op, dict):
-                    continue
-                for t in op.get("tags") or []:
-                    if t not in seen_tags:
-                        seen_tags.add(t)
-                        tags.append({"name": t})
-    return {
-        "openapi": "3.0.3",
-        "x-source": "gateway-aggregated",
-        "info": {
-            "title": "🏭 Edge HMI API Documentation",
-            "version": APP_VERSION,
-            "description": f"게이트웨이 (테이블 API 프록시). Total {len(tags)} tables integrated.",
-        },
-        "paths": paths,
-        "tags": tags,
-        "servers": [],
-        "components": {"schemas": all_schemas},
-    }
+    """각 테이블 서비스 openapi.json 병합 결과 (메모리 캐시, 백그라운드 갱신). 유일한 OpenAPI 소스."""
+    return await openapi_cache.get()
 
 
 _PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
@@ -155,4 +177,13 @@ def _register_proxy_routes():
         )
 
 
-_register_proxy_routes()
+def _register_table_routers():
+    """Monolith mode: same URL surface as proxy, served in-process."""
+    for svc in TABLE_SERVICES:
+        app.include_router(importlib.import_module(f"{svc}.router").router)
+
+
+if settings.monolith:
+    _register_table_routers()
+else:
+    _register_proxy_routes()
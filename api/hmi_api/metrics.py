@@ -0,0 +1,59 @@
+"""Gateway-only metrics: upstream latency/errors per table service, coalescing and breaker state."""
+import httpx
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+UPSTREAM_REQUESTS = Counter(
+    "gateway_upstream_requests_total", "Upstream responses by table service and status", ["service", "status"]
+)
+UPSTREAM_DURATION = Histogram(
+    "gateway_upstream_duration_seconds", "Upstream latency until response headers", ["service"]
+)
+UPSTREAM_FAILURES = Counter(
+    "gateway_upstream_errors_total",
+    "Upstream failures (kind = connect | timeout | pool | protocol | circuit_open)",
+    ["service", "kind"],
+)
+
+
+def error_kind(e: Exception) -> str:
+    if isinstance(e, httpx.PoolTimeout):
+        return "pool"
+    if isinstance(e, httpx.ConnectTimeout) or isinstance(e, httpx.ConnectError):
+        return "connect"
+    if isinstance(e, httpx.TimeoutException):
+        return "timeout"
+    return "protocol"
+
+
+class GatewayCollector:
+    """Scrape-time view of SingleFlight counters and circuit breaker state."""
+
+    _STATE = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, single_flight, breakers) -> None:
+        self.single_flight = single_flight
+        self.breakers = breakers
+
+    def collect(self):
+        stats = self.single_flight.stats()
+        yield CounterMetricFamily(
+            "gateway_coalesce_upstream_calls", "GETs sent upstream by single-flight", value=stats["upstream_calls"]
+        )
+        yield CounterMetricFamily(
+            "gateway_coalesce_deduplicated", "GETs served from another in-flight call", value=stats["deduplicated"]
+        )
+        yield CounterMetricFamily(
+            "gateway_coalesce_oversize", "GETs streamed on their own (reply over COALESCE_MAX_BYTES)", value=stats["oversize"]
+        )
+        yield GaugeMetricFamily("gateway_coalesce_inflight", "Distinct coalesced GETs in flight", value=stats["inflight"])
+        g = GaugeMetricFamily(
+            "gateway_circuit_state", "Circuit breaker state (0 closed, 1 half_open, 2 open)", labels=["service"]
+        )
+        for svc, b in self.breakers.items():
+            g.add_metric([svc], self._STATE[b.state])
+        yield g
+
+
+def register_gateway_metrics(single_flight, breakers) -> None:
+    REGISTRY.register(GatewayCollector(single_flight, breakers))
@@ -0,0 +1,155 @@
+"""Aggregated /openapi.json: concurrent fetch of table specs + in-memory cache.
+
+Specs are fetched from all table services at once (bounded by OPENAPI_FETCH_TIMEOUT)
+and merged. The merged document is served from memory; a background task
+re-fetches every OPENAPI_CACHE_TTL seconds and rebuilds only when an upstream
+spec (e.g. info.version) changed. A dead service keeps its last good spec and
+never delays a request once the cache is warm.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any
+
+from hmi_api.config import APP_VERSION, TABLE_SERVICES, settings
+from hmi_api.proxy import fetch_openapi
+
+logger = logging.getLogger(__name__)
+
+_SKIP_PATHS = {"/", "/health", "/openapi.json", "/docs", "/redoc"}
+
+
+def merge_specs(specs: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """각 테이블 서비스 openapi.json 병합 (TABLE_SERVICES 순서 유지)."""
+    paths: dict = {}
+    tags: list = []
+    seen_tags: set = set()
+    all_schemas: dict = {}
+    for svc in TABLE_SERVICES:
+        spec = specs.get(svc)
+        if not spec:
+            continue
+        comp = spec.get("components") or {}
+        for name, schema in (comp.get("schemas") or {}).items():
+            if name not in all_schemas:
+                all_schemas[name] = schema
+        for path, path_item in (spec.get("paths") or {}).items():
+            if path in _SKIP_PATHS or not path.startswith(f"/{svc}"):
+                continue
+            paths[path] = path_item
+            for op in (path_item or {}).values():
+                if not isinstance(op, dict):
+                    continue
+                for t in op.get("tags") or []:
+                    if t not in seen_tags:
+                        seen_tags.add(t)
+                        tags.append({"name": t})
+    return {
+        "openapi": "3.0.3",
+        "x-source": "gateway-aggregated",
+        "info": {
+            "title": "🏭 Edge HMI API Documentation",
+            "version": APP_VERSION,
+            "description": f"게이트웨이 (테이블 API 프록시). Total {len(tags)} tables integrated.",
+        },
+        "paths": paths,
+        "tags": tags,
+        "servers": [],
+        "components": {"schemas": all_schemas},
+    }
+
+
+def local_specs() -> dict[str, dict[str, Any]]:
+    """Monolith mode: build each table spec from its in-process router."""
+    from fastapi.openapi.utils import get_openapi
+
+    specs: dict[str, dict[str, Any]] = {}
+    for svc in TABLE_SERVICES:
+        router = importlib.import_module(f"{svc}.router").router
+        specs[svc] = get_openapi(title=svc, version=APP_VERSION, routes=router.routes)
+    return specs
+
+
+class OpenApiCache:
+    """Merged spec cache. refresh() is single-flight; stale reads never block."""
+
+    def __init__(self) -> None:
+        self._specs: dict[str, dict[str, Any]] = {}
+        self._merged: dict[str, Any] | None = None
+        self._fetched_at = 0.0
+        self._refreshing: asyncio.Task | None = None
+        self._loop_task: asyncio.Task | None = None
+
+    async def _fetch_all(self) -> None:
+        results = await asyncio.gather(
+            *(fetch_openapi(svc, timeout=settings.OPENAPI_FETCH_TIMEOUT) for svc in TABLE_SERVICES)
+        )
+        changed = self._merged is None
+        for svc, spec in zip(TABLE_SERVICES, results):
+            if spec is None:
+                continue  # unreachable: keep last good spec
+            if self._specs.get(svc) != spec:
+                self._specs[svc] = spec
+                changed = True
+        if changed:
+            self._merged = merge_specs(self._specs)
+        self._fetched_at = time.monotonic()
+
+    def refresh(self) -> asyncio.Task:
+        """Start (or join) one concurrent re-fetch of all specs."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._fetch_all())
+        return self._refreshing
+
+    async def get(self) -> dict[str, Any]:
+        if self._merged is None:
+            if settings.monolith:
+                self._load_local()
+            else:
+                await self.refresh()
+        elif not settings.monolith and time.monotonic() - self._fetched_at > settings.OPENAPI_CACHE_TTL:
+            self.refresh()
+        return self._merged or merge_specs({})
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "cached_services": sorted(self._specs),
+            "age_sec": round(time.monotonic() - self._fetched_at, 1) if self._fetched_at else None,
+        }
+
+    def _load_local(self) -> None:
+        # Monolith: routers are in-process, spec is fixed for the life of the app.
+        self._specs = local_specs()
+        self._merged = merge_specs(self._specs)
+        self._fetched_at = time.monotonic()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("openapi cache refresh failed")
+            await asyncio.sleep(settings.OPENAPI_CACHE_TTL)
+
+    def start(self) -> None:
+        """Warm cache now and keep refreshing in background (app startup)."""
+        if settings.monolith:
+            self._load_local()
+            return
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        for task in (self._loop_task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._loop_task = None
+        self._refreshing = None
+
+
+openapi_cache = OpenApiCache()
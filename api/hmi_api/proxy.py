@@ -1,55 +1,252 @@
 """Proxy requests to table API containers."""
-from typing import Any
+import time
+from typing import Any, NamedTuple
 
 import httpx
 from fastapi import Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from hmi_api.breaker import breakers
+from hmi_api.coalesce import SingleFlight
 from hmi_api.config import TABLE_SERVICES, settings
+from hmi_api.metrics import UPSTREAM_DURATION, UPSTREAM_FAILURES, UPSTREAM_REQUESTS, error_kind
+
+# service -> long-lived AsyncClient (keep-alive pool). Opened/closed by app lifespan.
+_clients: dict[str, httpx.AsyncClient] = {}
+# Identical concurrent GETs (path + query + COALESCE_KEY_HEADERS) share one upstream call.
+single_flight = SingleFlight()
+
+
+def _new_client(service: str) -> httpx.AsyncClient:
+    max_conn = settings.max_connections(service)
+    return httpx.AsyncClient(
+        base_url=settings.base_url(service),
+        limits=httpx.Limits(
+            max_connections=max_conn,
+            max_keepalive_connections=min(settings.UPSTREAM_MAX_KEEPALIVE, max_conn),
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.UPSTREAM_TIMEOUT,
+            connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+            pool=settings.UPSTREAM_POOL_TIMEOUT,
+        ),
+    )
+
+
+async def start_clients() -> None:
+    """Create one pooled client per table service (app startup)."""
+    for svc in TABLE_SERVICES:
+        if svc not in _clients:
+            _clients[svc] = _new_client(svc)
+
+
+async def close_clients() -> None:
+    """Close all pooled clients (app shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for c in clients:
+        await c.aclose()
+
+
+def get_client(service: str) -> httpx.AsyncClient:
+    """Pooled client for service. Created lazily if lifespan did not run (e.g. tests)."""
+    client = _clients.get(service)
+    if client is None:
+        client = _clients[service] = _new_client(service)
+    return client
+
+
+_HOP_REQ_HEADERS = ("host", "connection", "transfer-encoding")
+_HOP_RESP_HEADERS = ("transfer-encoding", "connection")
+
+
+def is_stream_path(path: str) -> bool:
+    """Path (query ignored) ends with one of STREAM_PATH_SUFFIXES: always streamed, never buffered."""
+    return path.split("?", 1)[0].endswith(tuple(settings.STREAM_PATH_SUFFIXES))
+
+
+def _has_body(request: Request) -> bool:
+    h = request.headers
+    return "transfer-encoding" in h or h.get("content-length", "0") not in ("", "0")
+
+
+# Upstream errors answered with 503/504 instead of a 500
+UPSTREAM_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+# The subset that counts against the circuit breaker (service not accepting connections)
+BREAKER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def _unreachable(service: str, e: Exception) -> JSONResponse:
+    if isinstance(e, httpx.ReadTimeout):
+        return JSONResponse({"detail": f"Table API '{service}' timed out", "error": str(e)}, status_code=504)
+    return JSONResponse(
+        {"detail": f"Table API '{service}' is not reachable. Is the container running?", "error": str(e)},
+        status_code=503,
+    )
+
+
+def _circuit_open(service: str) -> JSONResponse:
+    UPSTREAM_FAILURES.labels(service, "circuit_open").inc()
+    return JSONResponse(
+        {"detail": f"Table API '{service}' is unavailable (circuit open). Retry later."},
+        status_code=503,
+        headers={"Retry-After": str(breakers[service].retry_after())},
+    )
+
+
+async def send_upstream(service: str, client: httpx.AsyncClient, req: httpx.Request) -> httpx.Response:
+    """client.send(stream=True) with upstream latency/status/error metrics. Caller must close the response."""
+    t0 = time.perf_counter()
+    try:
+        r = await client.send(req, stream=True)
+    except httpx.HTTPError as e:
+        UPSTREAM_FAILURES.labels(service, error_kind(e)).inc()
+        raise
+    UPSTREAM_DURATION.labels(service).observe(time.perf_counter() - t0)
+    UPSTREAM_REQUESTS.labels(service, str(r.status_code)).inc()
+    return r
+
+
+class _Buffered(NamedTuple):
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+
+
+async def _fetch_buffered(
+    service: str, method: str, path: str, headers: dict[str, str], params: Any, body: bytes | None
+) -> _Buffered:
+    """Whole upstream reply as raw bytes (Content-Encoding untouched)."""
+    client = get_client(service)
+    req = client.build_request(method, path, headers=headers, content=body, params=params)
+    r = await send_upstream(service, client, req)
+    try:
+        content = b"".join([chunk async for chunk in r.aiter_raw()])
+    finally:
+        await r.aclose()
+    out_headers = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_RESP_HEADERS}
+    return _Buffered(r.status_code, out_headers, content)
+
+
+async def _fetch_coalescable(service: str, path: str, headers: dict[str, str], params: Any) -> _Buffered | None:
+    """GET for the coalescer: whole reply if it fits COALESCE_MAX_BYTES, else None (each caller streams its own).
+
+    A declared Content-Length over the cap is rejected before any body is read.
+    """
+    limit = settings.COALESCE_MAX_BYTES
+    client = get_client(service)
+    req = client.build_request("GET", path, headers=headers, params=params)
+    r = await send_upstream(service, client, req)
+    try:
+        declared = r.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > limit:
+            return None
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in r.aiter_raw():
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+    finally:
+        await r.aclose()
+    out_headers = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_RESP_HEADERS}
+    return _Buffered(r.status_code, out_headers, b"".join(chunks))
+
+
+def _coalesce_key(service: str, request: Request, path: str) -> tuple:
+    h = request.headers
+    return (
+        service,
+        path,
+        tuple(sorted(request.query_params.multi_items())),
+        tuple(h.get(k, "") for k in settings.COALESCE_KEY_HEADERS),
+    )
 
 
 async def proxy_to_table(service: str, request: Request, path: str) -> Response:
     """Forward request to table service. path includes leading slash."""
     if service not in TABLE_SERVICES:
         return JSONResponse({"detail": f"Unknown table: {service}"}, status_code=404)
-    base = settings.base_url(service)
-    url = f"{base}{path}"
-    headers = {k: v for k, v in request.headers.items() if k.lower() not in ("host", "connection")}
+    breaker = breakers[service]
+    if not breaker.allow():
+        return _circuit_open(service)
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_REQ_HEADERS}
+    # Relay the client's Accept-Encoding as-is; never let httpx's default ask upstream for gzip
+    # on behalf of a client that cannot decode it (bodies are relayed raw).
+    headers.setdefault("accept-encoding", "identity")
+    always_stream = is_stream_path(path)
     try:
-        body = await request.body()
-    except Exception:
-        body = b""
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            r = await client.request(
-                request.method,
-                url,
-                headers=headers,
-                content=body,
-                params=request.query_params,
+        if request.method == "GET" and settings.COALESCE_GETS and not always_stream:
+            b = await single_flight.do(
+                _coalesce_key(service, request, path),
+                lambda: _fetch_coalescable(service, path, headers, request.query_params),
             )
-    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
-        return JSONResponse(
-            {"detail": f"Table API '{service}' is not reachable. Is the container running?", "error": str(e)},
-            status_code=503,
-        )
-    out_headers = {k: v for k, v in r.headers.items() if k.lower() not in ("transfer-encoding", "connection")}
+            if b is None:
+                single_flight.oversize += 1
+                return await _proxy_streaming(service, request, path, headers)
+        elif settings.PROXY_STREAMING or always_stream:
+            return await _proxy_streaming(service, request, path, headers)
+        else:
+            try:
+                body = await request.body()
+            except Exception:
+                body = b""
+            b = await _fetch_buffered(service, request.method, path, headers, request.query_params, body)
+    except UPSTREAM_ERRORS as e:
+        if isinstance(e, BREAKER_ERRORS):
+            breaker.record_failure()
+        return _unreachable(service, e)
+    breaker.record_response(b.status_code)
     return Response(
-        content=r.content,
+        content=b.content,
+        status_code=b.status_code,
+        headers=b.headers,
+        media_type=b.headers.get("content-type"),
+    )
+
+
+async def _proxy_streaming(service: str, request: Request, path: str, headers: dict[str, str]) -> Response:
+    """Forward request body and upstream response chunk by chunk (raw bytes, encoding untouched)."""
+    client = get_client(service)
+    req = client.build_request(
+        request.method,
+        path,
+        headers=headers,
+        content=request.stream() if _has_body(request) else None,
+        params=request.query_params,
+    )
+    try:
+        r = await send_upstream(service, client, req)
+    except UPSTREAM_ERRORS as e:
+        if isinstance(e, BREAKER_ERRORS):
+            breakers[service].record_failure()
+        return _unreachable(service, e)
+    breakers[service].record_response(r.status_code)
+
+    async def _body():
+        try:
+            async for chunk in r.aiter_raw():
+                yield chunk
+        finally:
+            await r.aclose()
+
+    out_headers = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_RESP_HEADERS}
+    return StreamingResponse(
+        _body(),
         status_code=r.status_code,
         headers=out_headers,
         media_type=r.headers.get("content-type"),
     )
 
 
-async def fetch_openapi(service: str) -> dict[str, Any] | None:
+async def fetch_openapi(service: str, timeout: float = 10.0) -> dict[str, Any] | None:
     """Fetch /openapi.json from a table service."""
-    base = settings.base_url(service)
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            r = await client.get(f"{base}/openapi.json")
-            if r.status_code == 200:
-                return r.json()
-        except Exception:
-            pass
+    try:
+        r = await get_client(service).get("/openapi.json", timeout=timeout)
+        if r.status_code == 200:
+            return r.json()
+    except Exception:
+        pass
     return None
@@ -54,6 +54,9 @@ const FEATURE_USAGE = {
           steps: [
             { api: "kpi_sum", curl: 'curl "{{BASE}}/kpi_sum?calc_date=2025-01-01&equip_id=1"' },
             { api: "kpi_cfg", curl: 'curl "{{BASE}}/kpi_cfg"' },
+            { api: "prod_his/hourly", curl: 'curl "{{BASE}}/prod_his/hourly?equip_id=1&time_from=...&time_to=..."' },
+            { api: "kpi_sum/rollup", curl: 'curl "{{BASE}}/kpi_sum/rollup?date_from=...&date_to=...&group_by=line&group_by=month"' },
+            { api: "kpi_sum/compute", curl: 'curl "{{BASE}}/kpi_sum/compute?date_from=...&date_to=...&equip_id=1&std_cycle_time=30"' },
           ],
         },
         {
@@ -77,10 +80,10 @@ const FEATURE_USAGE = {
       id: "02",
       title: "Process & Trend",
       features: [
-        { id: "2.1", title: "Standard Work Compliance", purpose: "Motor current load patterns", steps: [{ api: "sensor_mst, measurement", curl: "Filter by sensor_id, time_from, time_to" }] },
+        { id: "2.1", title: "Standard Work Compliance", purpose: "Motor current load patterns", steps: [{ api: "sensor_mst, measurement", curl: "Filter by sensor_id, time_from, time_to" }, { api: "measurement/downsample (lttb)", curl: 'curl "{{BASE}}/measurement/downsample?sensor_id=3&time_from=...&time_to=...&mode=lttb&points=1000"' }] },
         { id: "2.2", title: "Status Transition Trend", purpose: "Operating→Idle→Stopped→Fault", steps: [{ api: "status_his", curl: 'curl "{{BASE}}/status_his?equip_id=1&start_time_from=...&start_time_to=..."' }] },
         { id: "2.3", title: "Multi-equipment Comparison", purpose: "Compare KPI/alarm across equipment", steps: [{ api: "kpi_sum, alarm_his", curl: "Query per equip_id" }] },
-        { id: "2.4", title: "Multi-time-series Trend", purpose: "Period/worker/part/sensor charts", steps: [{ api: "measurement", curl: 'curl "{{BASE}}/measurement?equip_id=1&sensor_id=2&time_from=...&time_to=...&limit=1000"' }] },
+        { id: "2.4", title: "Multi-time-series Trend", purpose: "Period/worker/part/sensor charts", steps: [{ api: "measurement", curl: 'curl "{{BASE}}/measurement?equip_id=1&sensor_id=2&time_from=...&time_to=...&limit=1000"' }, { api: "measurement/downsample (long windows)", curl: 'curl "{{BASE}}/measurement/downsample?sensor_id=2&time_from=...&time_to=...&points=500"' }, { api: "measurement/frame (sensors on one time axis)", curl: 'curl "{{BASE}}/measurement/frame?sensor_id=2&sensor_id=3&time_from=...&time_to=...&bucket=PT5M&fill=locf"' }, { api: "batch (many sensors, one call)", curl: 'curl -X POST "{{BASE}}/batch" -H "Content-Type: application/json" -d \'{"requests":[{"id":"s2","path":"/measurement?sensor_id=2&limit=1000"},{"id":"s3","path":"/measurement?sensor_id=3&limit=1000"}]}\'' }] },
       ],
     },
     {
@@ -1,10 +1,15 @@
 """FastAPI app for kpi_cfg only. Single-table container."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from kpi_cfg.router import router
 
 app = FastAPI(title="edge-hmi kpi_cfg API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "kpi_cfg")
 
 
 @app.get("/")
@@ -0,0 +1,281 @@
+"""KPI engine in NumPy: same formulas as core.fn_kpi_sum_calc, computed in memory without writing kpi_sum.
+
+Windows come from shift_map × shift_cfg (one per shift_map row, like the SQL function) or are an
+ad-hoc [time_from, time_to) per equip. Source rows for all windows are loaded in one query per
+table (times as integer epoch microseconds, exact) and evaluated with interval arithmetic:
+
+- events (prod_his, alarm_his, maint_his start) are sorted by (equip, time); per-window totals
+  are prefix-sum differences between two searchsorted positions
+- status_his 'Run' segments are expanded into (window, segment) pairs only for segments that can
+  overlap (start in [win_start - longest segment of that equip, win_end)), then clipped to the window
+
+Run/planned seconds are summed as integers and divided once, as the SQL does with numeric, so
+results match fn_kpi_sum_calc (MTTR to within float rounding). compute() loads the source rows;
+evaluate() is the pure array part (unit-tested without a DB in api/tests/test_kpi_engine.py).
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_OPEN = np.iinfo(np.int64).max  # end of a status segment still running
+_NO_WO = -1  # prod_his row without work order
+
+
+def _us(col: str) -> str:
+    return f"(EXTRACT(EPOCH FROM {col}) * 1000000)::bigint"
+
+
+_SHIFT_WINDOWS = f"""
+SELECT DISTINCT sm.work_date AS calc_date, sm.shift_def_id, sm.line_id, sm.equip_id,
+       {_us("w.win_start")} AS ws, {_us("w.win_end")} AS we, kc.std_cycle_time
+FROM shift_map sm
+JOIN shift_cfg sc ON sc.id = sm.shift_def_id
+CROSS JOIN LATERAL fn_kpi_shift_window(sm.work_date, sc.start_time, sc.end_time) w
+LEFT JOIN kpi_cfg kc ON kc.equip_id = sm.equip_id
+WHERE sm.work_date BETWEEN :date_from AND :date_to AND sm.equip_id IS NOT NULL
+  {{equip}}
+ORDER BY 1, 2, 4, 3
+"""
+_EQUIPS = """
+SELECT e.id AS equip_id, e.line_id, kc.std_cycle_time
+FROM equip_mst e
+LEFT JOIN kpi_cfg kc ON kc.equip_id = e.id
+{where}
+ORDER BY e.id
+"""
+_RUN = f"""
+SELECT equip_id, {_us("start_time")}, COALESCE({_us("end_time")}, {_OPEN})
+FROM status_his
+WHERE equip_id = ANY(:ids) AND status_code = 'Run'
+  AND start_time < :hi AND (end_time IS NULL OR end_time > :lo)
+"""
+_PROD = f"""
+SELECT equip_id, {_us("time")}, COALESCE(total_cnt, 0), COALESCE(good_cnt, 0), COALESCE(work_order_id, {_NO_WO})
+FROM prod_his
+WHERE equip_id = ANY(:ids) AND time >= :lo AND time < :hi
+"""
+_ALARM = f"""
+SELECT equip_id, {_us("time")}
+FROM alarm_his
+WHERE equip_id = ANY(:ids) AND time >= :lo AND time < :hi
+"""
+_MAINT = f"""
+SELECT equip_id, {_us("start_time")}, {_us("end_time")}
+FROM maint_his
+WHERE equip_id = ANY(:ids) AND start_time >= :lo AND start_time < :hi AND end_time IS NOT NULL
+"""
+
+
+def to_us(t: datetime) -> int:
+    """Epoch microseconds (naive datetimes are taken as UTC)."""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return (t - EPOCH) // timedelta(microseconds=1)
+
+
+def from_us(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(us))
+
+
+def _fetch(db: Session, sql: str, params: dict, width: int) -> np.ndarray:
+    rows = db.execute(text(sql), params).all()
+    return np.array(rows, dtype=np.int64).reshape(len(rows), width)
+
+
+class Windows:
+    """One row per (calc_date, shift_def_id, line_id, equip_id) or per equip for ad-hoc ranges."""
+
+    def __init__(self, rows: list[dict], ws, we) -> None:
+        self.rows = rows
+        self.equip = np.array([r["equip_id"] for r in rows], dtype=np.int64)
+        self.ws = np.asarray(ws, dtype=np.int64)
+        self.we = np.asarray(we, dtype=np.int64)
+        self.std_ct = np.array([np.nan if r["std_cycle_time"] is None else r["std_cycle_time"] for r in rows], dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def shift_windows(db: Session, date_from: date, date_to: date, equip_ids: list[int] | None = None) -> Windows:
+    """Shift windows for shift_map rows with work_date in [date_from, date_to]."""
+    params: dict = {"date_from": date_from, "date_to": date_to}
+    equip = ""
+    if equip_ids:
+        params["equip_ids"] = list(equip_ids)
+        equip = "AND sm.equip_id = ANY(:equip_ids)"
+    rows = [dict(r._mapping) for r in db.execute(text(_SHIFT_WINDOWS.format(equip=equip)), params)]
+    return Windows(rows, [r.pop("ws") for r in rows], [r.pop("we") for r in rows])
+
+
+def range_windows(db: Session, time_from: datetime, time_to: datetime, equip_ids: list[int] | None = None) -> Windows:
+    """One ad-hoc window [time_from, time_to) per equip (all equips if equip_ids is empty)."""
+    params: dict = {}
+    where = ""
+    if equip_ids:
+        params["equip_ids"] = list(equip_ids)
+        where = "WHERE e.id = ANY(:equip_ids)"
+    rows = [dict(r._mapping) for r in db.execute(text(_EQUIPS.format(where=where)), params)]
+    n = len(rows)
+    return Windows(rows, np.full(n, to_us(time_from)), np.full(n, to_us(time_to)))
+
+
+def _expand(lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index ranges [lo_i, hi_i) → (window index, element index) pairs."""
+    counts = np.maximum(hi - lo, 0)
+    win = np.repeat(np.arange(len(lo)), counts)
+    before = np.repeat(np.cumsum(counts) - counts, counts)
+    return win, np.repeat(lo, counts) + np.arange(counts.sum()) - before
+
+
+class _Keyed:
+    """Rows sorted by (equip rank, time) with a single int64 key, for vectorized searchsorted."""
+
+    def __init__(self, uniq: np.ndarray, t0: int, span: int, equip: np.ndarray, t: np.ndarray) -> None:
+        self.uniq, self.t0, self.span = uniq, t0, span
+        key = self.key(np.searchsorted(uniq, equip), t)
+        self.order = np.argsort(key, kind="stable")
+        self.keys = key[self.order]
+
+    def key(self, rank: np.ndarray, t: np.ndarray) -> np.ndarray:
+        return rank * self.span + (np.clip(t, self.t0, self.t0 + self.span - 1) - self.t0)
+
+    def bounds(self, rank: np.ndarray, t_lo: np.ndarray, t_hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Positions of rows with time in [t_lo, t_hi) per window."""
+        return (
+            np.searchsorted(self.keys, self.key(rank, t_lo), "left"),
+            np.searchsorted(self.keys, self.key(rank, t_hi), "left"),
+        )
+
+
+def _range_sum(keyed: _Keyed, values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    csum = np.concatenate(([0], np.cumsum(values[keyed.order])))
+    return csum[hi] - csum[lo]
+
+
+def compute(db: Session, w: Windows, std_cycle_time: float | None = None) -> list[dict]:
+    """KPI per window. std_cycle_time overrides kpi_cfg for every equip (what-if)."""
+    if not len(w):
+        return []
+    uniq = np.unique(w.equip)
+    params = {"ids": uniq.tolist(), "lo": from_us(int(w.ws.min())), "hi": from_us(int(w.we.max()))}
+    return evaluate(
+        w,
+        run=_fetch(db, _RUN, params, 3),
+        prod=_fetch(db, _PROD, params, 5),
+        alarm=_fetch(db, _ALARM, params, 2),
+        maint=_fetch(db, _MAINT, params, 3),
+        std_cycle_time=std_cycle_time,
+    )
+
+
+def _dominant(win: np.ndarray, wo: np.ndarray, cnt: np.ndarray, n: int) -> np.ndarray:
+    """Per window, the work order with the largest summed count (ties: lowest id), else _NO_WO."""
+    out = np.full(n, _NO_WO, dtype=np.int64)
+    m = wo != _NO_WO
+    if not m.any():
+        return out
+    pairs, inv = np.unique(np.stack([win[m], wo[m]], axis=1), axis=0, return_inverse=True)
+    sums = np.bincount(inv.ravel(), weights=cnt[m])
+    order = np.lexsort((pairs[:, 1], -sums, pairs[:, 0]))
+    first = order[np.r_[True, pairs[order[1:], 0] != pairs[order[:-1], 0]]]
+    out[pairs[first, 0]] = pairs[first, 1]
+    return out
+
+
+def evaluate(
+    w: Windows,
+    run: np.ndarray,
+    prod: np.ndarray,
+    alarm: np.ndarray,
+    maint: np.ndarray,
+    std_cycle_time: float | None = None,
+) -> list[dict]:
+    """KPI per window from int64 source arrays (times in epoch µs), one row per source row:
+
+    run (equip_id, start, end or _OPEN), prod (equip_id, time, total, good, work_order_id or _NO_WO),
+    alarm (equip_id, time), maint (equip_id, start, end). Rows outside the windows are ignored.
+    """
+    if not len(w):
+        return []
+    lo, hi = int(w.ws.min()), int(w.we.max())
+    uniq = np.unique(w.equip)
+    run, prod, alarm, maint = (x[np.isin(x[:, 0], uniq)] for x in (run, prod, alarm, maint))
+
+    # Times live in [lo - 1, hi): earlier segment starts are clamped to lo - 1, which changes
+    # neither overlap nor clipped length for windows starting at or after lo.
+    t0, span = lo - 1, hi - lo + 2
+    rank = np.searchsorted(uniq, w.equip)
+    n = len(w)
+
+    def events(equip, t):
+        k = _Keyed(uniq, t0, span, equip, t)
+        return k, *k.bounds(rank, w.ws, w.we)
+
+    k, a, b = events(prod[:, 0], prod[:, 1])
+    total = _range_sum(k, prod[:, 2], a, b)
+    good = _range_sum(k, prod[:, 3], a, b)
+    win, idx = _expand(a, b)
+    work_order = _dominant(win, prod[k.order, 4][idx], prod[k.order, 2][idx], n)
+    k, a, b = events(alarm[:, 0], alarm[:, 1])
+    failures = b - a
+    k, a, b = events(maint[:, 0], maint[:, 1])
+    repair_us = _range_sum(k, maint[:, 2] - maint[:, 1], a, b)
+    repairs = b - a
+
+    run_us = np.zeros(n)  # float64 sums of integer µs: exact below 2**53
+    start = np.maximum(run[:, 1], t0)
+    end = run[:, 2]
+    for is_open in (False, True):
+        m = (end == _OPEN) == is_open
+        if not m.any():
+            continue
+        k = _Keyed(uniq, t0, span, run[m, 0], start[m])
+        s, e = start[m][k.order], end[m][k.order]
+        if is_open:
+            t_lo = np.full(n, t0)  # open segments overlap every later window of their equip
+        else:
+            longest = np.zeros(len(uniq), dtype=np.int64)
+            np.maximum.at(longest, np.searchsorted(uniq, run[m, 0]), end[m] - start[m])
+            t_lo = w.ws - longest[rank]
+        win, idx = _expand(*k.bounds(rank, t_lo, w.we))
+        clip = np.minimum(e[idx], w.we[win]) - np.maximum(s[idx], w.ws[win])
+        run_us += np.bincount(win, weights=np.maximum(clip, 0), minlength=n)
+
+    planned = (w.we - w.ws) / 1e6
+    run_sec = run_us / 1e6
+    std_ct = np.full(n, std_cycle_time, dtype=float) if std_cycle_time is not None else w.std_ct
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avail = np.where(planned > 0, np.minimum(1.0, run_sec / planned), 0.0)
+        has_perf = (run_sec > 0) & ~np.isnan(std_ct) & (std_ct > 0)
+        perf = np.where(has_perf, np.minimum(1.0, total.astype(float) * std_ct / run_sec), 0.0)
+        qual = np.where(total > 0, good.astype(float) / total, 0.0)
+        mttr = repair_us / 1e6 / 60.0 / repairs
+        mtbf = run_sec / 3600.0 / failures
+        uph = good.astype(float) * 3600.0 / planned
+    oee = avail * perf * qual
+
+    out = []
+    for i, row in enumerate(w.rows):
+        out.append(
+            {
+                **{k: v for k, v in row.items() if k != "std_cycle_time"},
+                "work_order_id": int(work_order[i]) if work_order[i] != _NO_WO else None,
+                "availability": float(avail[i]),
+                "performance": float(perf[i]),
+                "quality": float(qual[i]),
+                "oee": float(oee[i]),
+                "mttr": float(mttr[i]) if repairs[i] else None,
+                "mtbf": float(mtbf[i]) if run_sec[i] > 0 and failures[i] else None,
+                "uph": float(uph[i]) if planned[i] > 0 else None,
+                "planned_sec": float(planned[i]),
+                "run_sec": float(run_sec[i]),
+                "total_cnt": int(total[i]),
+                "good_cnt": int(good[i]),
+                "failure_cnt": int(failures[i]),
+                "repair_cnt": int(repairs[i]),
+            }
+        )
+    return out
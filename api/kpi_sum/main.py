@@ -1,10 +1,15 @@
-"""FastAPI app for kpi_sum only (read-only). Single-table container."""
+"""FastAPI app for kpi_sum only (read-only; /compute evaluates KPIs in memory). Single-table container."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from kpi_sum.router import router
 
 app = FastAPI(title="edge-hmi kpi_sum API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "kpi_sum")
 
 
 @app.get("/")
@@ -0,0 +1,92 @@
+"""kpi_sum roll-up: KPIs over a date range grouped by line / equip / shift / day / week / month.
+
+Ratios are never averaged row by row. Each one is weighted by what it is a ratio of, using the weight
+columns fn_kpi_sum_calc stores on every row:
+
+- availability, oee: planned_sec · performance: run_sec · quality: total_cnt · mttr: repair_cnt
+- mtbf = Σrun_sec / 3600 / Σfailure_cnt, uph = Σgood_cnt · 3600 / Σplanned_sec
+
+A week of OEE is therefore Σ(good · std_cycle_time) / Σplanned, as if the week were one shift.
+Rows written before the weight columns existed (planned_sec NULL) are skipped until recalculated.
+An equip mapped to several lines in one shift has one kpi_sum row per line with the same weights;
+only one of them is counted per (calc_date, shift_def_id, equip_id), or per line when grouping by line.
+There is no work-order grouping: kpi_sum.work_order_id labels the whole shift with its main work
+order, so per-work-order totals would need the counts split by work order.
+"""
+from datetime import date
+from typing import Literal
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+GroupBy = Literal["line", "equip", "shift", "day", "week", "month"]
+
+KEYS = {"line": "line_id", "equip": "equip_id", "shift": "shift_def_id"}
+PERIODS = {
+    "day": "calc_date",
+    "week": "date_trunc('week', calc_date)::date",
+    "month": "date_trunc('month', calc_date)::date",
+}
+_ROLLUP = """
+SELECT {columns}count(*) AS row_cnt,
+       sum(planned_sec) AS planned_sec,
+       sum(run_sec) AS run_sec,
+       sum(total_cnt) AS total_cnt,
+       sum(good_cnt) AS good_cnt,
+       sum(failure_cnt) AS failure_cnt,
+       sum(availability * planned_sec) / NULLIF(sum(planned_sec), 0) AS availability,
+       sum(performance * run_sec) / NULLIF(sum(run_sec), 0) AS performance,
+       sum(quality * total_cnt) / NULLIF(sum(total_cnt), 0) AS quality,
+       sum(oee * planned_sec) / NULLIF(sum(planned_sec), 0) AS oee,
+       sum(mttr * repair_cnt) / NULLIF(sum(repair_cnt), 0) AS mttr,
+       CASE WHEN sum(run_sec) > 0 THEN sum(run_sec) / 3600.0 / NULLIF(sum(failure_cnt), 0) END AS mtbf,
+       sum(good_cnt) * 3600.0 / NULLIF(sum(planned_sec), 0) AS uph
+FROM (
+  SELECT DISTINCT ON (calc_date, shift_def_id, equip_id{per_line}) *
+  FROM kpi_sum
+  WHERE calc_date BETWEEN :date_from AND :date_to
+    AND planned_sec IS NOT NULL
+    {filters}
+  ORDER BY calc_date, shift_def_id, equip_id, line_id
+) k
+{group}
+"""
+
+
+def rollup(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    group_by: list[GroupBy],
+    line_id: int | None = None,
+    equip_ids: list[int] | None = None,
+    shift_def_id: int | None = None,
+) -> list[dict]:
+    """One row per group (a single total row if group_by is empty). At most one of day / week / month."""
+    exprs = {}
+    for g in group_by:
+        if g in PERIODS:
+            exprs["period"] = PERIODS[g]
+        else:
+            exprs[KEYS[g]] = KEYS[g]
+    params: dict = {"date_from": date_from, "date_to": date_to}
+    filters = []
+    for col, value in (("line_id", line_id), ("shift_def_id", shift_def_id)):
+        if value is not None:
+            params[col] = value
+            filters.append(f"AND {col} = :{col}")
+    if equip_ids:
+        params["equip_ids"] = list(equip_ids)
+        filters.append("AND equip_id = ANY(:equip_ids)")
+    group = ""
+    if exprs:
+        positions = ", ".join(str(i + 1) for i in range(len(exprs)))
+        group = f"GROUP BY {positions}\nORDER BY {positions}"
+    sql = _ROLLUP.format(
+        columns="".join(f"{e} AS {name},\n       " for name, e in exprs.items()),
+        per_line=", line_id" if "line" in group_by else "",
+        filters="\n    ".join(filters),
+        group=group,
+    )
+    keys = dict.fromkeys(("period", *KEYS.values()))
+    return [{**keys, **r._mapping} for r in db.execute(text(sql), params)]
@@ -1,12 +1,15 @@
-from datetime import date
+from datetime import date, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from shared.config import settings
 from shared.deps import get_db
 from shared.models import KpiSum as KpiSumModel
 
-from kpi_sum.schemas import KpiSumRead
+from kpi_sum.engine import compute, range_windows, shift_windows
+from kpi_sum.rollup import PERIODS, GroupBy, rollup
+from kpi_sum.schemas import KpiSumComputed, KpiSumRead, KpiSumRollup
 
 router = APIRouter(prefix="/kpi_sum", tags=["kpi_sum"])
 
@@ -30,6 +33,60 @@ def list_(
     return q.order_by(KpiSumModel.id).offset(skip).limit(limit).all()
 
 
+_EQUIP_QUERY = Query(None, description="Repeatable: equip_id=1&equip_id=2. Default: all")
+_STD_CT_QUERY = Query(None, gt=0, description="What-if: use this std_cycle_time for every equip instead of kpi_cfg")
+
+
+@router.get("/rollup", response_model=list[KpiSumRollup])
+def rollup_(
+    date_from: date,
+    date_to: date,
+    group_by: list[GroupBy] = Query([], description="Repeatable: group_by=line&group_by=week. Empty: one total row"),
+    line_id: int | None = None,
+    equip_id: list[int] | None = _EQUIP_QUERY,
+    shift_def_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    """Weighted KPI roll-up of stored kpi_sum rows over calc_date in [date_from, date_to]."""
+    if date_to < date_from:
+        raise HTTPException(400, "date_to must not be before date_from")
+    if len({g for g in group_by if g in PERIODS}) > 1:
+        raise HTTPException(400, "group_by accepts at most one of day, week, month")
+    return rollup(db, date_from, date_to, group_by, line_id, equip_id, shift_def_id)
+
+
+@router.get("/compute", response_model=list[KpiSumComputed])
+def compute_shifts(
+    date_from: date,
+    date_to: date,
+    equip_id: list[int] | None = _EQUIP_QUERY,
+    std_cycle_time: float | None = _STD_CT_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Same rows as fn_kpi_sum_calc for work dates [date_from, date_to], computed in memory (nothing written)."""
+    if date_to < date_from:
+        raise HTTPException(400, "date_to must not be before date_from")
+    if (date_to - date_from).days >= settings.KPI_COMPUTE_MAX_DAYS:
+        raise HTTPException(400, f"at most {settings.KPI_COMPUTE_MAX_DAYS} days per request")
+    return compute(db, shift_windows(db, date_from, date_to, equip_id), std_cycle_time)
+
+
+@router.get("/compute/range", response_model=list[KpiSumComputed])
+def compute_range(
+    time_from: datetime,
+    time_to: datetime,
+    equip_id: list[int] | None = _EQUIP_QUERY,
+    std_cycle_time: float | None = _STD_CT_QUERY,
+    db: Session = Depends(get_db),
+):
+    """KPI per equip over an ad-hoc window [time_from, time_to) instead of shifts (planned time = window)."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    if (time_to - time_from).days >= settings.KPI_COMPUTE_MAX_DAYS:
+        raise HTTPException(400, f"at most {settings.KPI_COMPUTE_MAX_DAYS} days per request")
+    return compute(db, range_windows(db, time_from, time_to, equip_id), std_cycle_time)
+
+
 @router.get("/{id}", response_model=KpiSumRead)
 def get(id: int, db: Session = Depends(get_db)):
     row = db.get(KpiSumModel, id)
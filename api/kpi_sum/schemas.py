@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict
 
@@ -17,4 +17,55 @@ class KpiSumRead(BaseModel):
     mttr: float | None
     mtbf: float | None
     uph: float | None
+    planned_sec: float | None = None
+    run_sec: float | None = None
+    total_cnt: int | None = None
+    good_cnt: int | None = None
+    failure_cnt: int | None = None
+    repair_cnt: int | None = None
     model_config = ConfigDict(from_attributes=True)
+
+
+class KpiSumRollup(BaseModel):
+    """Weighted KPI per group (kpi_sum.rollup). Keys not in group_by are null; period = first day of day/week/month."""
+
+    period: date | None
+    line_id: int | None
+    equip_id: int | None
+    shift_def_id: int | None
+    row_cnt: int
+    availability: float | None
+    performance: float | None
+    quality: float | None
+    oee: float | None
+    mttr: float | None
+    mtbf: float | None
+    uph: float | None
+    planned_sec: float | None
+    run_sec: float | None
+    total_cnt: int | None
+    good_cnt: int | None
+    failure_cnt: int | None
+
+
+class KpiSumComputed(BaseModel):
+    """KPI computed in memory (kpi_sum.engine); not stored. calc_date / shift_def_id are null for ad-hoc ranges."""
+
+    calc_date: date | None = None
+    shift_def_id: int | None = None
+    line_id: int | None
+    equip_id: int
+    work_order_id: int | None
+    availability: float
+    performance: float
+    quality: float
+    oee: float
+    mttr: float | None
+    mtbf: float | None
+    uph: float | None
+    planned_sec: float
+    run_sec: float
+    total_cnt: int
+    good_cnt: int
+    failure_cnt: int
+    repair_cnt: int
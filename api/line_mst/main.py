@@ -1,10 +1,15 @@
 """FastAPI app for line_mst only. Single-table container."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from line_mst.router import router
 
 app = FastAPI(title="edge-hmi line_mst API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "line_mst")
 
 
 @app.get("/")
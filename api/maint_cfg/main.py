@@ -1,10 +1,15 @@
 """FastAPI app for maint_cfg only. Single-table container."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from maint_cfg.router import router
 
 app = FastAPI(title="edge-hmi maint_cfg API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "maint_cfg")
 
 
 @app.get("/")
@@ -0,0 +1,103 @@
+"""Downsampling for measurement trends: TimescaleDB time_bucket aggregates, or LTTB (Largest-Triangle-Three-Buckets).
+
+bucket: one row per bucket with min / max / avg / first / last / count, buckets aligned to time_from.
+lttb:   the series is pre-aggregated in SQL to at most DOWNSAMPLE_LTTB_MAX_INPUT fine buckets
+        (avg value at the bucket's first sample time), then reduced to `points` samples that
+        keep the visual shape (peaks/valleys). Both keep the payload bounded for any window.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import Row, text
+from sqlalchemy.orm import Session
+
+_FILTER = """
+WHERE sensor_id = :sensor_id
+  AND time >= :time_from AND time < :time_to
+  AND value IS NOT NULL
+  {equip}
+"""
+_BUCKETS = """
+SELECT time_bucket(:width, time, :time_from) AS time,
+       min(value) AS min, max(value) AS max, avg(value) AS avg,
+       first(value, time) AS first, last(value, time) AS last,
+       count(*) AS count
+FROM measurement
+{filter}
+GROUP BY 1
+ORDER BY 1
+"""
+_FINE = """
+SELECT min(time) AS time, avg(value) AS value
+FROM measurement
+{filter}
+GROUP BY time_bucket(:width, time, :time_from)
+ORDER BY 1
+"""
+_MIN_WIDTH = timedelta(milliseconds=1)
+
+
+def bucket_width(time_from: datetime, time_to: datetime, points: int) -> timedelta:
+    """Smallest width (ms resolution) that splits the window into at most `points` buckets."""
+    window_ms = (time_to - time_from) // _MIN_WIDTH
+    return max(_MIN_WIDTH, _MIN_WIDTH * -(-window_ms // points))
+
+
+def _params(sensor_id: int, equip_id: int | None, time_from: datetime, time_to: datetime, width: timedelta):
+    params = {"sensor_id": sensor_id, "time_from": time_from, "time_to": time_to, "width": width}
+    equip = ""
+    if equip_id is not None:
+        params["equip_id"] = equip_id
+        equip = "AND equip_id = :equip_id"
+    return _FILTER.format(equip=equip), params
+
+
+def query_buckets(
+    db: Session, sensor_id: int, equip_id: int | None, time_from: datetime, time_to: datetime, width: timedelta
+) -> list[Row]:
+    """Rows of (time, min, max, avg, first, last, count)."""
+    where, params = _params(sensor_id, equip_id, time_from, time_to, width)
+    return db.execute(text(_BUCKETS.format(filter=where)), params).all()
+
+
+def query_lttb(
+    db: Session,
+    sensor_id: int,
+    equip_id: int | None,
+    time_from: datetime,
+    time_to: datetime,
+    points: int,
+    max_input: int,
+) -> list[tuple[datetime, float]]:
+    width = bucket_width(time_from, time_to, max_input)
+    where, params = _params(sensor_id, equip_id, time_from, time_to, width)
+    series = [(r.time, r.value) for r in db.execute(text(_FINE.format(filter=where)), params)]
+    return lttb(series, points)
+
+
+def lttb(series: list[tuple[datetime, float]], threshold: int) -> list[tuple[datetime, float]]:
+    """Largest-Triangle-Three-Buckets. Keeps first/last point; `series` must be time-ordered, threshold >= 3."""
+    n = len(series)
+    if threshold >= n or threshold < 3:
+        return list(series)
+    xs = [t.timestamp() for t, _ in series]
+    ys = [v for _, v in series]
+    out = [series[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # next bucket's average is the third triangle vertex
+        lo = int((i + 1) * every) + 1
+        hi = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[lo:hi]) / (hi - lo)
+        avg_y = sum(ys[lo:hi]) / (hi - lo)
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(series[best])
+        a = best
+    out.append(series[-1])
+    return out
@@ -0,0 +1,95 @@
+"""Response formats for measurement reads, built from DB row tuples (no per-row Pydantic objects).
+
+json      default, list of objects (response_model validation, unchanged)
+columnar  JSON object of column arrays: {"time": [...], "value": [...], ...}
+msgpack   same columnar shape as MessagePack (time as native Timestamp ext)
+arrow     Apache Arrow IPC stream, one record batch; extra fields go to schema metadata
+
+Chosen by ?format= or, failing that, the Accept header.
+"""
+import json
+from typing import Any, Literal
+
+from fastapi import HTTPException, Response
+from pydantic_core import to_json
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+try:
+    import pyarrow as pa
+except ImportError:  # optional
+    pa = None
+
+Format = Literal["json", "columnar", "msgpack", "arrow"]
+
+MEDIA_TYPES = {
+    "columnar": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+_ACCEPT = (
+    ("application/vnd.apache.arrow.stream", "arrow"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack", "msgpack"),
+)
+
+FORMAT_RESPONSES = {
+    200: {
+        "content": {
+            "application/msgpack": {"schema": {"type": "string", "format": "binary"}},
+            "application/vnd.apache.arrow.stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+        "description": "JSON by default; format=columnar | msgpack | arrow (or Accept) for column-oriented output",
+    }
+}
+
+
+def negotiate(fmt: Format | None, accept: str) -> Format:
+    if fmt is not None:
+        return fmt
+    accept = accept.lower()
+    for media_type, name in _ACCEPT:
+        if media_type in accept:
+            return name
+    return "json"
+
+
+def to_columns(rows, fields: tuple[str, ...]) -> dict[str, list]:
+    cols = list(zip(*rows)) if rows else [() for _ in fields]
+    return {name: list(col) for name, col in zip(fields, cols)}
+
+
+def render(
+    fmt: Format,
+    columns: dict[str, list],
+    meta: dict[str, Any] | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Encode columns (+ scalar meta fields) as columnar JSON, MessagePack or Arrow IPC."""
+    meta = meta or {}
+    if fmt == "columnar":
+        body = to_json({**meta, **columns})
+    elif fmt == "msgpack":
+        if msgpack is None:
+            raise HTTPException(406, "msgpack format unavailable (install msgpack)")
+        body = msgpack.packb({**meta, **columns}, datetime=True)
+    elif fmt == "arrow":
+        if pa is None:
+            raise HTTPException(406, "arrow format unavailable (install pyarrow)")
+        body = _arrow_ipc(columns, meta)
+    else:
+        raise ValueError(fmt)
+    headers = {**(headers or {}), "Vary": "Accept"}
+    return Response(body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def _arrow_ipc(columns: dict[str, list], meta: dict[str, Any]) -> bytes:
+    table = pa.table(columns)
+    if meta:
+        table = table.replace_schema_metadata({k: json.dumps(v) for k, v in meta.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,74 @@
+"""Time-aligned multi-sensor "wide frame": one timestamp column + one column per sensor, pivoted in SQL.
+
+One GROUP BY over all requested sensors with one `agg(value) FILTER (WHERE sensor_id = …)`
+column per sensor. fill=none returns only buckets with data; null / locf / interpolate
+use TimescaleDB time_bucket_gapfill so every bucket in the window is present.
+"""
+from datetime import datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+Agg = Literal["avg", "min", "max", "first", "last"]
+Fill = Literal["none", "null", "locf", "interpolate"]
+
+_AGG = {
+    "avg": "avg(value)",
+    "min": "min(value)",
+    "max": "max(value)",
+    "first": "first(value, time)",
+    "last": "last(value, time)",
+}
+_FRAME = """
+SELECT {bucket} AS time,
+       {columns}
+FROM measurement
+WHERE sensor_id IN ({ids})
+  AND time >= :time_from AND time < :time_to
+  {equip}
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+def query_frame(
+    db: Session,
+    sensor_ids: list[int],
+    time_from: datetime,
+    time_to: datetime,
+    width: timedelta,
+    agg: Agg = "avg",
+    fill: Fill = "none",
+    equip_id: int | None = None,
+) -> dict[str, list]:
+    """→ {"time": [...], "<sensor_id>": [...], ...} (columns in sensor_ids order)."""
+    params: dict = {"time_from": time_from, "time_to": time_to, "width": width}
+    cols = []
+    for i, sid in enumerate(sensor_ids):
+        params[f"s{i}"] = sid
+        expr = f"{_AGG[agg]} FILTER (WHERE sensor_id = :s{i})"
+        if fill == "locf":
+            expr = f"locf({expr})"
+        elif fill == "interpolate":
+            expr = f"interpolate({expr})"
+        cols.append(f"{expr} AS s{i}")
+    if fill == "none":
+        bucket = "time_bucket(:width, time)"
+    else:
+        bucket = "time_bucket_gapfill(:width, time, :time_from, :time_to)"
+    equip = ""
+    if equip_id is not None:
+        params["equip_id"] = equip_id
+        equip = "AND equip_id = :equip_id"
+    sql = _FRAME.format(
+        bucket=bucket,
+        columns=",\n       ".join(cols),
+        ids=", ".join(f":s{i}" for i in range(len(sensor_ids))),
+        equip=equip,
+    )
+    rows = db.execute(text(sql), params).all()
+    out: dict[str, list] = {"time": [r[0] for r in rows]}
+    for i, sid in enumerate(sensor_ids):
+        out[str(sid)] = [r[i + 1] for r in rows]
+    return out
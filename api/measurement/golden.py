@@ -0,0 +1,121 @@
+"""Golden-batch comparison: align the current run to a golden reference run on relative time.
+
+Both runs are bucketed by offset from their own start (floor((time - start) / width)).
+The golden envelope (mean, σ, count per relative bucket) depends only on
+(sensor_id, golden_from, golden_to, width). It is computed once and kept in an LRU of
+GOLDEN_CACHE_SIZE entries for at most GOLDEN_CACHE_TTL seconds. Bulk ingest drops the
+entries whose golden range overlaps the rows it wrote (late or corrected golden data); the
+TTL covers writes that bypass the API.
+The band mean ± k·σ is applied per request, so different k values share one envelope.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.config import settings
+
+_RELATIVE = """
+SELECT floor(extract(epoch FROM time - :start) / :width)::bigint AS idx,
+       avg(value) AS mean, stddev_samp(value) AS std, count(*) AS count
+FROM measurement
+WHERE sensor_id = :sensor_id AND time >= :start AND time < :end AND value IS NOT NULL
+GROUP BY 1
+ORDER BY 1
+"""
+
+Envelope = dict[int, tuple[float, float | None, int]]  # idx → (mean, std, count)
+
+
+def _relative_buckets(db: Session, sensor_id: int, start: datetime, end: datetime, width: timedelta) -> Envelope:
+    params = {"sensor_id": sensor_id, "start": start, "end": end, "width": width.total_seconds()}
+    return {r.idx: (r.mean, r.std, r.count) for r in db.execute(text(_RELATIVE), params)}
+
+
+def _utc(t: datetime) -> datetime:
+    return t if t.tzinfo is not None else t.replace(tzinfo=timezone.utc)
+
+
+class EnvelopeCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[tuple, tuple[Envelope, float]] = OrderedDict()  # key → (envelope, loaded at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, sensor_id: int, golden_from: datetime, golden_to: datetime, width: timedelta) -> tuple[Envelope, bool]:
+        """→ (envelope, cache hit)."""
+        key = (sensor_id, golden_from, golden_to, width)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl <= 0 or time.monotonic() - entry[1] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+        env = _relative_buckets(db, sensor_id, golden_from, golden_to, width)
+        with self._lock:
+            self.misses += 1
+            self._data[key] = (env, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return env, False
+
+    def invalidate(self, sensor_ids: Iterable[int], times: Iterable[datetime]) -> None:
+        """Drop envelopes of sensor_ids whose golden range overlaps the span of times (rows were written there)."""
+        ids = set(sensor_ids)
+        utc = [_utc(t) for t in times]
+        if not ids or not utc:
+            return
+        lo, hi = min(utc), max(utc)
+        with self._lock:
+            stale = [k for k in self._data if k[0] in ids and _utc(k[1]) <= hi and lo < _utc(k[2])]
+            for k in stale:
+                del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+envelope_cache = EnvelopeCache(settings.GOLDEN_CACHE_SIZE, settings.GOLDEN_CACHE_TTL)
+
+
+def compare(
+    db: Session,
+    sensor_id: int,
+    golden_from: datetime,
+    golden_to: datetime,
+    time_from: datetime,
+    width: timedelta,
+    k: float,
+) -> tuple[list[dict], bool]:
+    """Band + deviation per relative bucket of the golden run. → (points, envelope cache hit)."""
+    env, hit = envelope_cache.get(db, sensor_id, golden_from, golden_to, width)
+    current = _relative_buckets(db, sensor_id, time_from, time_from + (golden_to - golden_from), width)
+    points = []
+    for idx in sorted(env):
+        mean, std, count = env[idx]
+        half = k * (std or 0.0)
+        cur = current.get(idx)
+        value = cur[0] if cur else None
+        points.append(
+            {
+                "offset_seconds": idx * width.total_seconds(),
+                "time": time_from + idx * width,
+                "mean": mean,
+                "lower": mean - half,
+                "upper": mean + half,
+                "golden_count": count,
+                "value": value,
+                "deviation": None if value is None else value - mean,
+                "outside": None if value is None else not (mean - half <= value <= mean + half),
+            }
+        )
+    return points, hit
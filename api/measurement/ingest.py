@@ -0,0 +1,165 @@
+"""Bulk ingest for measurement: parse JSON / NDJSON / CSV rows, write via COPY into a temp table + one INSERT … SELECT.
+
+Rows are validated in Python (bad rows are reported, not fatal), COPY'd into a
+per-connection temp table, then merged into the hypertable in a single statement
+that drops rows with unknown equip_id/sensor_id, de-duplicates the batch on the
+primary key (last row wins) and resolves conflicts with DO NOTHING (skip) or
+DO UPDATE (upsert).
+"""
+import csv
+import io
+import json
+import math
+from datetime import datetime, timezone
+from typing import Any, Literal
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+Row = tuple[datetime, int, int, float | None]
+OnConflict = Literal["skip", "upsert"]
+
+_CSV_TYPES = ("text/csv", "application/csv")
+_NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+_TMP_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS _measurement_ingest (
+    seq BIGSERIAL,
+    time TIMESTAMPTZ,
+    equip_id INTEGER,
+    sensor_id INTEGER,
+    value FLOAT
+) ON COMMIT DELETE ROWS
+"""
+_TMP_COPY = "COPY _measurement_ingest (time, equip_id, sensor_id, value) FROM STDIN WITH (FORMAT csv)"
+_MERGE = """
+WITH valid AS (
+    SELECT t.seq, t.time, t.equip_id, t.sensor_id, t.value
+    FROM _measurement_ingest t
+    WHERE EXISTS (SELECT 1 FROM equip_mst e WHERE e.id = t.equip_id)
+      AND EXISTS (SELECT 1 FROM sensor_mst s WHERE s.id = t.sensor_id)
+), src AS (
+    SELECT DISTINCT ON (time, equip_id, sensor_id) time, equip_id, sensor_id, value
+    FROM valid
+    ORDER BY time, equip_id, sensor_id, seq DESC
+), ins AS (
+    INSERT INTO measurement (time, equip_id, sensor_id, value)
+    SELECT time, equip_id, sensor_id, value FROM src
+    ON CONFLICT (time, equip_id, sensor_id) {action}
+    RETURNING time, equip_id, sensor_id, value
+), newest AS (
+    SELECT DISTINCT ON (sensor_id) time, equip_id, sensor_id, value
+    FROM ins
+    ORDER BY sensor_id, time DESC
+)
+SELECT (SELECT count(*) FROM valid) AS valid,
+       (SELECT count(*) FROM ins) AS written,
+       (SELECT json_agg(newest) FROM newest) AS newest
+"""
+_ACTIONS = {"skip": "DO NOTHING", "upsert": "DO UPDATE SET value = EXCLUDED.value"}
+
+
+def _parse_time(v: Any) -> datetime:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return datetime.fromtimestamp(v, tz=timezone.utc)
+    if isinstance(v, str) and v:
+        return datetime.fromisoformat(v)
+    raise ValueError(f"invalid time: {v!r}")
+
+
+_INT4_MIN, _INT4_MAX = -(2**31), 2**31 - 1
+
+
+def _parse_int(v: Any, name: str) -> int:
+    if isinstance(v, bool) or v is None or v == "":
+        raise ValueError(f"invalid {name}: {v!r}")
+    if isinstance(v, float) and not v.is_integer():  # int() would truncate 1.7 to 1 (or overflow on inf)
+        raise ValueError(f"invalid {name}: {v!r}")
+    n = int(v)
+    if not _INT4_MIN <= n <= _INT4_MAX:  # INTEGER column: would fail the whole COPY
+        raise ValueError(f"{name} out of range: {v!r}")
+    return n
+
+
+def _parse_value(v: Any) -> float | None:
+    if v is None or v == "":
+        return None
+    if isinstance(v, bool):
+        raise ValueError(f"invalid value: {v!r}")
+    f = float(v)
+    if not math.isfinite(f):  # nan / inf would poison SPC and downsample aggregates
+        raise ValueError(f"invalid value: {v!r}")
+    return f
+
+
+def _row(obj: Any) -> Row:
+    if isinstance(obj, dict):
+        t, e, s, v = obj.get("time"), obj.get("equip_id"), obj.get("sensor_id"), obj.get("value")
+    elif isinstance(obj, (list, tuple)) and len(obj) in (3, 4):
+        t, e, s = obj[0], obj[1], obj[2]
+        v = obj[3] if len(obj) == 4 else None
+    else:
+        raise ValueError("expected {time, equip_id, sensor_id, value} or [time, equip_id, sensor_id, value]")
+    return _parse_time(t), _parse_int(e, "equip_id"), _parse_int(s, "sensor_id"), _parse_value(v)
+
+
+def _records(body: bytes, content_type: str):
+    """Yield raw records (dict / list) in payload order."""
+    ctype = content_type.split(";", 1)[0].strip().lower()
+    if ctype in _CSV_TYPES:
+        reader = csv.reader(io.StringIO(body.decode("utf-8-sig")))
+        for i, rec in enumerate(reader):
+            if i == 0 and rec and rec[0].strip().lower() == "time":
+                continue  # header
+            if rec:
+                yield rec
+    elif ctype in _NDJSON_TYPES:
+        for line in body.splitlines():
+            if line.strip():
+                yield json.loads(line)
+    else:
+        data = json.loads(body or b"[]")
+        if isinstance(data, dict):
+            data = data.get("rows")
+        if not isinstance(data, list):
+            raise ValueError('JSON body must be an array of rows or {"rows": [...]}')
+        yield from data
+
+
+def parse_payload(body: bytes, content_type: str, max_rows: int) -> tuple[list[Row], list[dict[str, Any]], int]:
+    """→ (valid rows, per-row errors, received count). Raises ValueError on unparseable payloads."""
+    rows: list[Row] = []
+    errors: list[dict[str, Any]] = []
+    received = 0
+    try:
+        for i, rec in enumerate(_records(body, content_type)):
+            received += 1
+            if received > max_rows:
+                raise OverflowError(f"payload exceeds {max_rows} rows")
+            try:
+                rows.append(_row(rec))
+            except (ValueError, TypeError, OverflowError) as e:
+                errors.append({"row": i, "error": str(e)})
+    except (json.JSONDecodeError, UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"malformed payload: {e}") from e
+    return rows, errors, received
+
+
+def copy_rows(db: Session, rows: list[Row], on_conflict: OnConflict = "skip") -> tuple[int, int, list[Row]]:
+    """COPY rows into the hypertable. → (rows with known equip/sensor, rows written, newest written row per sensor)."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for t, e, s, v in rows:
+        w.writerow((t.isoformat(), e, s, "" if v is None else repr(v)))
+    buf.seek(0)
+    conn = db.connection()
+    cur = conn.connection.dbapi_connection.cursor()
+    try:
+        cur.execute(_TMP_DDL)
+        cur.copy_expert(_TMP_COPY, buf)
+    finally:
+        cur.close()
+    valid, written, newest = db.execute(text(_MERGE.format(action=_ACTIONS[on_conflict]))).one()
+    db.commit()
+    newest = [(datetime.fromisoformat(r["time"]), r["equip_id"], r["sensor_id"], r["value"]) for r in newest or []]
+    return valid, written, newest
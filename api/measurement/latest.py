@@ -0,0 +1,108 @@
+"""Last-known value per (equip_id, sensor_id), held in memory.
+
+rebuild(): DISTINCT ON (sensor_id) … ORDER BY sensor_id, time DESC, served by
+idx_measurement_sensor_time (TimescaleDB SkipScan: one index probe per sensor, not a scan).
+update(): called by bulk ingest with the newest row per sensor it wrote.
+refresh_if_stale(): incremental pass (rows since the last refresh, minus an overlap) so
+rows written by other processes / direct DB writers show up within LATEST_REFRESH_INTERVAL.
+Reads are O(number of sensors).
+"""
+import logging
+import threading
+import time as _time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from shared.config import settings
+from shared.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_LATEST = """
+SELECT DISTINCT ON (sensor_id) sensor_id, equip_id, time, value
+FROM measurement
+{where}
+ORDER BY sensor_id, time DESC
+"""
+# Late-arriving rows within this window before the previous refresh are still picked up.
+_OVERLAP = timedelta(seconds=60)
+
+
+def _merge(by_equip: dict, rows) -> None:
+    for t, equip_id, sensor_id, value in rows:
+        sensors = by_equip.setdefault(equip_id, {})
+        cur = sensors.get(sensor_id)
+        if cur is None or t >= cur[0]:
+            sensors[sensor_id] = (t, value)
+
+
+class LatestCache:
+    def __init__(self) -> None:
+        self._by_equip: dict[int, dict[int, tuple[datetime, float | None]]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._since: datetime | None = None  # next incremental lower bound
+        self._refreshed = 0.0  # monotonic time of last rebuild/refresh
+
+    @property
+    def loaded(self) -> bool:
+        return self._since is not None
+
+    def update(self, rows) -> None:
+        """Merge (time, equip_id, sensor_id, value) rows; keeps the newest per sensor."""
+        with self._lock:
+            _merge(self._by_equip, rows)
+
+    def _load(self, since: datetime | None) -> None:
+        started = datetime.now(timezone.utc)
+        sql = _LATEST.format(where="WHERE time > :since" if since is not None else "")
+        with SessionLocal() as db:
+            rows = db.execute(text(sql), {"since": since}).all()
+        rows = [(r.time, r.equip_id, r.sensor_id, r.value) for r in rows]
+        if since is None:
+            fresh: dict[int, dict[int, tuple[datetime, float | None]]] = {}
+            _merge(fresh, rows)
+            with self._lock:
+                self._by_equip = fresh
+        else:
+            self.update(rows)
+        self._since = started - _OVERLAP
+        self._refreshed = _time.monotonic()
+
+    def rebuild(self) -> None:
+        with self._refresh_lock:
+            self._load(None)
+        logger.info("measurement latest cache: %d sensors", self.sensor_count())
+
+    def refresh_if_stale(self) -> None:
+        """Rebuild if never loaded; else incremental refresh when older than LATEST_REFRESH_INTERVAL.
+        Concurrent callers do not wait for a refresh already in progress (they read current data)."""
+        if self.loaded and _time.monotonic() - self._refreshed < settings.LATEST_REFRESH_INTERVAL:
+            return
+        if not self._refresh_lock.acquire(blocking=not self.loaded):
+            return
+        try:
+            self._load(self._since)
+        finally:
+            self._refresh_lock.release()
+
+    def get(self, equip_id: int | None = None, sensor_id: int | None = None) -> list[tuple[int, int, datetime, float | None]]:
+        with self._lock:
+            if equip_id is not None:
+                groups = [(equip_id, self._by_equip.get(equip_id, {}))]
+            else:
+                groups = sorted(self._by_equip.items())
+            return [
+                (e, s, t, v)
+                for e, sensors in groups
+                for s, (t, v) in sorted(sensors.items())
+                if sensor_id is None or s == sensor_id
+            ]
+
+    def sensor_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._by_equip.values())
+
+
+latest_cache = LatestCache()
@@ -1,10 +1,35 @@
-"""FastAPI app for measurement only (hypertable). List + Create."""
+"""FastAPI app for measurement only (hypertable). List + bulk ingest (COPY) + latest values."""
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
 
+from measurement.latest import latest_cache
 from measurement.router import router
+from measurement.violations import violation_scanner
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await run_in_threadpool(latest_cache.rebuild)
+    except Exception as e:  # DB not up yet: first GET /measurement/latest loads it
+        logger.warning("measurement latest cache not built at startup: %s", e)
+    violation_scanner.start()
+    yield
+    await violation_scanner.stop()
+
 
-app = FastAPI(title="edge-hmi measurement API", version="1.0.1")
+app = FastAPI(title="edge-hmi measurement API", version="1.0.1", lifespan=lifespan)
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "measurement")
 
 
 @app.get("/")
@@ -1,34 +1,296 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from shared.config import settings
 from shared.deps import get_db
+from shared.export import EXPORT_RESPONSES, ExportFormat, export_response
 from shared.models import Measurement as MeasurementModel
+from shared.pagination import CURSOR_RESPONSES, NEXT_CURSOR_HEADER, paginate
 
-from measurement.schemas import MeasurementRead
+from measurement.downsample import bucket_width, query_buckets, query_lttb
+from measurement.formats import FORMAT_RESPONSES, Format, negotiate, render, to_columns
+from measurement.frame import Agg, Fill, query_frame
+from measurement.golden import compare, envelope_cache
+from measurement.ingest import OnConflict, copy_rows, parse_payload
+from measurement.latest import latest_cache
+from measurement.schemas import (
+    MeasurementBucket,
+    MeasurementDownsample,
+    MeasurementGolden,
+    MeasurementIngestResult,
+    MeasurementLatest,
+    MeasurementPoint,
+    MeasurementRead,
+    MeasurementSpc,
+    MeasurementViolation,
+)
+from measurement.spc import query_spc
+from measurement.violations import scan, violation_scanner
+
+_MAX_REPORTED_ERRORS = 20
 
 router = APIRouter(prefix="/measurement", tags=["measurement"])
 
+_ORDER = (MeasurementModel.time, MeasurementModel.equip_id, MeasurementModel.sensor_id)
+_FIELDS = ("time", "equip_id", "sensor_id", "value")
+_BUCKET_FIELDS = ("time", "min", "max", "avg", "first", "last", "count")
+_FORMAT_QUERY = Query(None, description="Response format (default json; or via Accept: application/msgpack, application/vnd.apache.arrow.stream)")
+
 
-@router.get("", response_model=list[MeasurementRead])
+def _filter(q, equip_id: int | None, sensor_id: int | None, time_from: datetime | None, time_to: datetime | None):
+    """Shared by list_ (Query) and export (Select)."""
+    if equip_id is not None:
+        q = q.filter(MeasurementModel.equip_id == equip_id)
+    if sensor_id is not None:
+        q = q.filter(MeasurementModel.sensor_id == sensor_id)
+    if time_from is not None:
+        q = q.filter(MeasurementModel.time >= time_from)
+    if time_to is not None:
+        q = q.filter(MeasurementModel.time <= time_to)
+    return q
+
+
+@router.get("", response_model=list[MeasurementRead], responses={200: {**CURSOR_RESPONSES[200], **FORMAT_RESPONSES[200]}})
 def list_(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
+    format: Format | None = _FORMAT_QUERY,
     skip: int = 0,
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page (keyset paging)"),
     limit: int = Query(100, le=1000),
     equip_id: int | None = None,
     sensor_id: int | None = None,
     time_from: datetime | None = None,
     time_to: datetime | None = None,
 ):
-    q = db.query(MeasurementModel)
-    if equip_id is not None:
-        q = q.filter(MeasurementModel.equip_id == equip_id)
-    if sensor_id is not None:
-        q = q.filter(MeasurementModel.sensor_id == sensor_id)
-    if time_from is not None:
-        q = q.filter(MeasurementModel.time >= time_from)
-    if time_to is not None:
-        q = q.filter(MeasurementModel.time <= time_to)
-    return q.order_by(MeasurementModel.time).offset(skip).limit(limit).all()
+    # Plain column rows (no ORM entities); json validates them via MeasurementRead, others encode columns.
+    q = _filter(db.query(*(getattr(MeasurementModel, f) for f in _FIELDS)), equip_id, sensor_id, time_from, time_to)
+    rows = paginate(q, _ORDER, response, limit, skip, cursor)
+    fmt = negotiate(format, request.headers.get("accept", ""))
+    if fmt == "json":
+        return rows
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else None
+    return render(fmt, to_columns(rows, _FIELDS), headers=headers)
+
+
+@router.get("/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export(
+    format: ExportFormat = "csv",
+    equip_id: int | None = None,
+    sensor_id: int | None = None,
+    time_from: datetime | None = None,
+    time_to: datetime | None = None,
+):
+    """Stream all matching rows as CSV or NDJSON (no row limit), ordered by (time, equip_id, sensor_id)."""
+    stmt = _filter(select(*(getattr(MeasurementModel, f) for f in _FIELDS)), equip_id, sensor_id, time_from, time_to)
+    return export_response(stmt.order_by(*_ORDER), _FIELDS, format, "measurement")
+
+
+@router.get("/latest", response_model=list[MeasurementLatest])
+async def latest(equip_id: int | None = None, sensor_id: int | None = None):
+    """Newest value and timestamp per sensor (all, one equipment, or one sensor) from the in-memory
+    last-value table. age_seconds = now - time (collection gap check). Refreshed every LATEST_REFRESH_INTERVAL."""
+    await run_in_threadpool(latest_cache.refresh_if_stale)
+    now = datetime.now(timezone.utc)
+    return [
+        MeasurementLatest(equip_id=e, sensor_id=s, time=t, value=v, age_seconds=(now - t).total_seconds())
+        for e, s, t, v in latest_cache.get(equip_id, sensor_id)
+    ]
 
+
+@router.get("/downsample", response_model=MeasurementDownsample, responses=FORMAT_RESPONSES)
+def downsample(
+    request: Request,
+    sensor_id: int,
+    time_from: datetime,
+    time_to: datetime,
+    equip_id: int | None = None,
+    mode: Literal["bucket", "lttb"] = "bucket",
+    points: int = Query(settings.DOWNSAMPLE_DEFAULT_POINTS, ge=3, le=settings.DOWNSAMPLE_MAX_POINTS),
+    bucket: timedelta | None = Query(None, description="Bucket width (mode=bucket), e.g. PT5M or 300. Default: window / points"),
+    format: Format | None = _FORMAT_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Chart-ready series for [time_from, time_to). mode=bucket: min/max/avg/first/last per time_bucket;
+    mode=lttb: at most `points` raw-shaped samples. Payload size is bounded by points / DOWNSAMPLE_MAX_POINTS."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    fmt = negotiate(format, request.headers.get("accept", ""))
+    meta = {"sensor_id": sensor_id, "equip_id": equip_id, "mode": mode}
+    if mode == "lttb":
+        series = query_lttb(db, sensor_id, equip_id, time_from, time_to, points, settings.DOWNSAMPLE_LTTB_MAX_INPUT)
+        if fmt != "json":
+            return render(fmt, to_columns(series, ("time", "value")), meta)
+        return MeasurementDownsample(**meta, points=[MeasurementPoint(time=t, value=v) for t, v in series])
+    if bucket is None:
+        bucket = bucket_width(time_from, time_to, points)
+    elif bucket < bucket_width(time_from, time_to, settings.DOWNSAMPLE_MAX_POINTS):
+        raise HTTPException(400, f"bucket too small: window would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    rows = query_buckets(db, sensor_id, equip_id, time_from, time_to, bucket)
+    meta["bucket_seconds"] = bucket.total_seconds()
+    if fmt != "json":
+        return render(fmt, to_columns(rows, _BUCKET_FIELDS), meta)
+    return MeasurementDownsample(**meta, buckets=[MeasurementBucket(**r._mapping) for r in rows])
+
+
+@router.get("/frame", responses=FORMAT_RESPONSES)
+def frame(
+    request: Request,
+    sensor_id: list[int] = Query(..., description="Repeatable, column order: sensor_id=1&sensor_id=2"),
+    time_from: datetime = Query(...),
+    time_to: datetime = Query(...),
+    equip_id: int | None = None,
+    agg: Agg = "avg",
+    fill: Fill = Query("none", description="none: buckets with data only; null / locf / interpolate: every bucket (gapfill)"),
+    points: int = Query(settings.DOWNSAMPLE_DEFAULT_POINTS, ge=3, le=settings.DOWNSAMPLE_MAX_POINTS),
+    bucket: timedelta | None = Query(None, description="Bucket width, e.g. PT1M. Default: window / points"),
+    format: Format | None = _FORMAT_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Time-aligned matrix for several sensors in one query: {"time": [...], "<sensor_id>": [...], ...}
+    (json = columnar; msgpack / arrow as for GET /measurement)."""
+    sensor_ids = list(dict.fromkeys(sensor_id))
+    if len(sensor_ids) > settings.FRAME_MAX_SENSORS:
+        raise HTTPException(400, f"at most {settings.FRAME_MAX_SENSORS} sensor_id values")
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    if bucket is None:
+        bucket = bucket_width(time_from, time_to, points)
+    elif bucket < bucket_width(time_from, time_to, settings.DOWNSAMPLE_MAX_POINTS):
+        raise HTTPException(400, f"bucket too small: window would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    columns = query_frame(db, sensor_ids, time_from, time_to, bucket, agg, fill, equip_id)
+    fmt = negotiate(format, request.headers.get("accept", ""))
+    meta = {"sensor_ids": sensor_ids, "bucket_seconds": bucket.total_seconds(), "agg": agg, "fill": fill}
+    return render("columnar" if fmt == "json" else fmt, columns, meta)
+
+
+@router.get("/violations", response_model=list[MeasurementViolation])
+def violations(
+    time_from: datetime,
+    time_to: datetime,
+    sensor_id: list[int] | None = Query(None, description="Repeatable. Default: all sensors with lsl/usl"),
+    equip_id: int | None = None,
+    line_id: int | None = None,
+    db: Session = Depends(get_db),
+):
+    """Out-of-spec intervals in [time_from, time_to): consecutive samples beyond lsl or usl per sensor,
+    with start, end (last violating sample), points, peak and the limit breached. Scanned in SQL."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    return scan(db, time_from, time_to, sensor_id, equip_id, line_id)
+
+
+@router.get("/violations/recent", response_model=list[MeasurementViolation])
+def violations_recent(equip_id: int | None = None, sensor_id: int | None = None):
+    """Intervals found by the background scanner (VIOLATION_SCAN_INTERVAL > 0), oldest first."""
+    if not settings.VIOLATION_SCAN_INTERVAL:
+        raise HTTPException(404, "background violation scan disabled (VIOLATION_SCAN_INTERVAL=0)")
+    return [
+        v
+        for v in list(violation_scanner.recent)
+        if (equip_id is None or v["equip_id"] == equip_id) and (sensor_id is None or v["sensor_id"] == sensor_id)
+    ]
+
+
+@router.get("/spc", response_model=list[MeasurementSpc])
+def spc(
+    time_from: datetime,
+    time_to: datetime,
+    sensor_id: list[int] | None = Query(None, description="Repeatable: sensor_id=1&sensor_id=2. Default: all sensors"),
+    equip_id: int | None = None,
+    bucket: timedelta | None = Query(None, description="Per-bucket statistics (e.g. PT1H, P1D). Default: one row per sensor for the whole window"),
+    db: Session = Depends(get_db),
+):
+    """SPC per sensor over [time_from, time_to): count, mean, std, min, max, Cp, Cpk,
+    ooc_count (outside lcl/ucl), oos_count (outside lsl/usl). Aggregated in SQL; limits from sensor_mst."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    if bucket is not None and bucket < bucket_width(time_from, time_to, settings.DOWNSAMPLE_MAX_POINTS):
+        raise HTTPException(400, f"bucket too small: window would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    return query_spc(db, time_from, time_to, sensor_id, equip_id, bucket)
+
+
+@router.get("/golden", response_model=MeasurementGolden)
+def golden(
+    sensor_id: int,
+    golden_from: datetime,
+    golden_to: datetime,
+    time_from: datetime = Query(..., description="Start of the current run (aligned to golden_from)"),
+    k: float = Query(3.0, ge=0, description="Band half-width in σ"),
+    points: int = Query(settings.DOWNSAMPLE_DEFAULT_POINTS, ge=3, le=settings.DOWNSAMPLE_MAX_POINTS),
+    bucket: timedelta | None = Query(None, description="Relative bucket width. Default: golden length / points"),
+    db: Session = Depends(get_db),
+):
+    """Golden-batch band (mean ± k·σ per relative-time bucket, cached per golden range) with the current
+    run's bucket mean, deviation and outside flag. The current run covers time_from + (golden_to - golden_from)."""
+    if golden_to <= golden_from:
+        raise HTTPException(400, "golden_to must be after golden_from")
+    if bucket is None:
+        bucket = bucket_width(golden_from, golden_to, points)
+    elif bucket < bucket_width(golden_from, golden_to, settings.DOWNSAMPLE_MAX_POINTS):
+        raise HTTPException(400, f"bucket too small: golden run would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    pts, cached = compare(db, sensor_id, golden_from, golden_to, time_from, bucket, k)
+    return MeasurementGolden(
+        sensor_id=sensor_id,
+        golden_from=golden_from,
+        golden_to=golden_to,
+        time_from=time_from,
+        bucket_seconds=bucket.total_seconds(),
+        k=k,
+        cached=cached,
+        points=pts,
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=MeasurementIngestResult,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"example": [{"time": "2025-01-01T08:00:00+09:00", "equip_id": 1, "sensor_id": 1, "value": 12.5}]},
+                "application/x-ndjson": {"example": '["2025-01-01T08:00:00+09:00", 1, 1, 12.5]'},
+                "text/csv": {"example": "time,equip_id,sensor_id,value\n2025-01-01T08:00:00+09:00,1,1,12.5"},
+            }
+        }
+    },
+)
+async def bulk_ingest(
+    request: Request,
+    on_conflict: OnConflict = "skip",
+    db: Session = Depends(get_db),
+):
+    """Bulk ingest via COPY. Body: JSON array (objects or [time, equip_id, sensor_id, value]), NDJSON or CSV.
+    Duplicate (time, equip_id, sensor_id): on_conflict=skip keeps existing, upsert overwrites value."""
+    body = await request.body()
+    try:
+        rows, errors, received = await run_in_threadpool(
+            parse_payload, body, request.headers.get("content-type", ""), settings.INGEST_MAX_ROWS
+        )
+    except OverflowError as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    valid = written = 0
+    if rows:
+        valid, written, newest = await run_in_threadpool(copy_rows, db, rows, on_conflict)
+        latest_cache.update(newest)
+        if written:
+            envelope_cache.invalidate({r[2] for r in rows}, (r[0] for r in rows))
+    unknown = len(rows) - valid
+    if unknown:
+        errors.append({"row": None, "error": f"{unknown} row(s) reference unknown equip_id/sensor_id"})
+    return MeasurementIngestResult(
+        received=received,
+        accepted=written,
+        rejected=received - len(rows) + unknown,
+        duplicates=valid - written,
+        errors=errors[:_MAX_REPORTED_ERRORS],
+    )
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict
 
@@ -16,3 +17,96 @@ class MeasurementCreate(MeasurementBase):
 
 class MeasurementRead(MeasurementBase):
     model_config = ConfigDict(from_attributes=True)
+
+
+class MeasurementIngestResult(BaseModel):
+    received: int
+    accepted: int
+    rejected: int
+    duplicates: int
+    errors: list[dict[str, Any]] = []
+
+
+class MeasurementLatest(BaseModel):
+    equip_id: int
+    sensor_id: int
+    time: datetime
+    value: float | None = None
+    age_seconds: float
+
+
+class MeasurementSpc(BaseModel):
+    sensor_id: int
+    equip_id: int
+    time: datetime | None = None  # bucket start (bucket=...), else None
+    count: int
+    mean: float | None = None
+    std: float | None = None
+    min: float | None = None
+    max: float | None = None
+    lsl: float | None = None
+    usl: float | None = None
+    lcl: float | None = None
+    ucl: float | None = None
+    cp: float | None = None
+    cpk: float | None = None
+    ooc_count: int
+    oos_count: int
+
+
+class MeasurementGoldenPoint(BaseModel):
+    offset_seconds: float
+    time: datetime
+    mean: float
+    lower: float
+    upper: float
+    golden_count: int
+    value: float | None = None
+    deviation: float | None = None
+    outside: bool | None = None
+
+
+class MeasurementGolden(BaseModel):
+    sensor_id: int
+    golden_from: datetime
+    golden_to: datetime
+    time_from: datetime
+    bucket_seconds: float
+    k: float
+    cached: bool
+    points: list[MeasurementGoldenPoint]
+
+
+class MeasurementViolation(BaseModel):
+    sensor_id: int
+    equip_id: int
+    breach: Literal["lsl", "usl"]
+    start: datetime
+    end: datetime
+    points: int
+    peak: float
+    limit_value: float
+
+
+class MeasurementBucket(BaseModel):
+    time: datetime
+    min: float
+    max: float
+    avg: float
+    first: float
+    last: float
+    count: int
+
+
+class MeasurementPoint(BaseModel):
+    time: datetime
+    value: float
+
+
+class MeasurementDownsample(BaseModel):
+    sensor_id: int
+    equip_id: int | None = None
+    mode: Literal["bucket", "lttb"]
+    bucket_seconds: float | None = None
+    buckets: list[MeasurementBucket] | None = None
+    points: list[MeasurementPoint] | None = None
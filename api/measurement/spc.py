@@ -0,0 +1,74 @@
+"""SPC statistics per sensor (optionally per time bucket), aggregated in SQL against sensor_mst limits.
+
+Only the aggregates leave the DB: count, mean, std (sample), min, max, the number of points
+outside the control limits (lcl/ucl) and the spec limits (lsl/usl). Cp / Cpk are derived from
+mean, std and the spec limits:
+
+    Cp  = (USL - LSL) / 6σ
+    Cpk = min(USL - μ, μ - LSL) / 3σ      (one-sided if only one spec limit is set)
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+_SPC = """
+SELECT m.sensor_id, s.equip_id, {bucket} AS time,
+       count(*) AS count, avg(m.value) AS mean, stddev_samp(m.value) AS std,
+       min(m.value) AS min, max(m.value) AS max,
+       s.lsl_val AS lsl, s.usl_val AS usl, s.lcl_val AS lcl, s.ucl_val AS ucl,
+       count(*) FILTER (WHERE m.value < s.lcl_val OR m.value > s.ucl_val) AS ooc_count,
+       count(*) FILTER (WHERE m.value < s.lsl_val OR m.value > s.usl_val) AS oos_count
+FROM measurement m
+JOIN sensor_mst s ON s.id = m.sensor_id
+WHERE m.time >= :time_from AND m.time < :time_to
+  AND m.value IS NOT NULL
+  {filters}
+GROUP BY m.sensor_id, s.id, 3
+ORDER BY m.sensor_id, 3
+"""
+
+
+def capability(mean: float | None, std: float | None, lsl: float | None, usl: float | None) -> tuple[float | None, float | None]:
+    """→ (Cp, Cpk). None where undefined (no spec limit, σ missing or 0)."""
+    if mean is None or not std:
+        return None, None
+    cp = (usl - lsl) / (6 * std) if lsl is not None and usl is not None else None
+    sides = []
+    if usl is not None:
+        sides.append(usl - mean)
+    if lsl is not None:
+        sides.append(mean - lsl)
+    cpk = min(sides) / (3 * std) if sides else None
+    return cp, cpk
+
+
+def query_spc(
+    db: Session,
+    time_from: datetime,
+    time_to: datetime,
+    sensor_ids: list[int] | None = None,
+    equip_id: int | None = None,
+    width: timedelta | None = None,
+) -> list[dict]:
+    params: dict = {"time_from": time_from, "time_to": time_to}
+    filters = []
+    if sensor_ids:
+        filters.append("AND m.sensor_id IN :sensor_ids")
+        params["sensor_ids"] = sensor_ids
+    if equip_id is not None:
+        filters.append("AND m.equip_id = :equip_id")
+        params["equip_id"] = equip_id
+    bucket = "NULL::timestamptz"
+    if width is not None:
+        bucket = "time_bucket(:width, m.time, :time_from)"
+        params["width"] = width
+    stmt = text(_SPC.format(bucket=bucket, filters="\n  ".join(filters)))
+    if sensor_ids:
+        stmt = stmt.bindparams(bindparam("sensor_ids", expanding=True))
+    out = []
+    for r in db.execute(stmt, params):
+        row = dict(r._mapping)
+        row["cp"], row["cpk"] = capability(row["mean"], row["std"], row["lsl"], row["usl"])
+        out.append(row)
+    return out
@@ -0,0 +1,190 @@
+"""Spec-limit (lsl/usl) violation scanner: returns violating intervals, not raw points.
+
+Limits come from an in-memory copy of sensor_mst (+ equip_mst.line_id), reloaded every
+LIMITS_CACHE_TTL seconds, and are joined in SQL as unnest(arrays). The scan is a
+gaps-and-islands query over (sensor_id, time): consecutive out-of-spec samples on the same
+side form one interval (start, end, peak, limit breached), so only intervals cross the wire.
+
+Optional background job (VIOLATION_SCAN_INTERVAL > 0): scans the most recent window every
+interval and keeps the last VIOLATION_RECENT_MAX intervals for GET /measurement/violations/recent.
+An interval found again at the start of the next window (same sensor and breach, starting no later
+than the known interval's end) continues it: end is extended, only points after the known end
+are added and the peak is merged, so a breach longer than the window stays one interval.
+"""
+import asyncio
+import logging
+import threading
+import time as _time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.config import settings
+from shared.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_LIMITS = """
+SELECT s.id, s.equip_id, e.line_id, s.lsl_val, s.usl_val
+FROM sensor_mst s
+JOIN equip_mst e ON e.id = s.equip_id
+WHERE s.lsl_val IS NOT NULL OR s.usl_val IS NOT NULL
+"""
+_SCAN = """
+WITH lim AS (
+    SELECT * FROM unnest(
+        CAST(:ids AS integer[]), CAST(:lsl AS float8[]), CAST(:usl AS float8[]), CAST(:after AS timestamptz[])
+    ) AS l(sensor_id, lsl, usl, after)
+), flagged AS (
+    SELECT m.sensor_id, m.equip_id, m.time, m.value, l.lsl, l.usl, l.after,
+           CASE WHEN m.value > l.usl THEN 'usl' WHEN m.value < l.lsl THEN 'lsl' END AS breach
+    FROM measurement m
+    JOIN lim l ON l.sensor_id = m.sensor_id
+    WHERE m.time >= :time_from AND m.time < :time_to AND m.value IS NOT NULL
+), edges AS (
+    SELECT *, CASE WHEN breach IS DISTINCT FROM lag(breach) OVER w THEN 1 ELSE 0 END AS edge
+    FROM flagged
+    WINDOW w AS (PARTITION BY sensor_id ORDER BY time)
+), islands AS (
+    SELECT *, sum(edge) OVER (PARTITION BY sensor_id ORDER BY time) AS grp
+    FROM edges
+)
+SELECT sensor_id, min(equip_id) AS equip_id, breach,
+       min(time) AS start, max(time) AS "end", count(*) AS points,
+       CASE breach WHEN 'usl' THEN max(value) ELSE min(value) END AS peak,
+       CASE breach WHEN 'usl' THEN max(usl) ELSE max(lsl) END AS limit_value,
+       count(*) FILTER (WHERE after IS NULL OR time > after) AS new_points
+FROM islands
+WHERE breach IS NOT NULL
+GROUP BY sensor_id, grp, breach
+ORDER BY sensor_id, start
+"""
+
+
+class SensorLimit(NamedTuple):
+    sensor_id: int
+    equip_id: int
+    line_id: int
+    lsl: float | None
+    usl: float | None
+
+
+class LimitsCache:
+    def __init__(self) -> None:
+        self._limits: dict[int, SensorLimit] = {}
+        self._loaded = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> dict[int, SensorLimit]:
+        with self._lock:
+            if not self._loaded or _time.monotonic() - self._loaded >= settings.LIMITS_CACHE_TTL:
+                self._limits = {r[0]: SensorLimit(*r) for r in db.execute(text(_LIMITS))}
+                self._loaded = _time.monotonic()
+            return self._limits
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = 0.0
+
+
+limits_cache = LimitsCache()
+
+
+def scan(
+    db: Session,
+    time_from: datetime,
+    time_to: datetime,
+    sensor_ids: list[int] | None = None,
+    equip_id: int | None = None,
+    line_id: int | None = None,
+    after: dict[int, datetime] | None = None,
+) -> list[dict]:
+    """Violating intervals in [time_from, time_to) for sensors with lsl and/or usl set.
+
+    after: sensor_id → time already reported; new_points counts only samples later than that.
+    """
+    limits = [
+        lim
+        for lim in limits_cache.get(db).values()
+        if (not sensor_ids or lim.sensor_id in sensor_ids)
+        and (equip_id is None or lim.equip_id == equip_id)
+        and (line_id is None or lim.line_id == line_id)
+    ]
+    if not limits:
+        return []
+    params = {
+        "ids": [lim.sensor_id for lim in limits],
+        "lsl": [lim.lsl for lim in limits],
+        "usl": [lim.usl for lim in limits],
+        "after": [(after or {}).get(lim.sensor_id) for lim in limits],
+        "time_from": time_from,
+        "time_to": time_to,
+    }
+    return [dict(r._mapping) for r in db.execute(text(_SCAN), params)]
+
+
+class ViolationScanner:
+    """Background job: scan [last run - overlap, now) every VIOLATION_SCAN_INTERVAL seconds."""
+
+    def __init__(self) -> None:
+        self.recent: deque[dict] = deque(maxlen=settings.VIOLATION_RECENT_MAX)
+        self.last_run: datetime | None = None
+        self._open: dict[tuple, dict] = {}  # (sensor_id, breach) → latest interval (same dict as in recent)
+        self._task: asyncio.Task | None = None
+
+    def _merge(self, found: list[dict], since: datetime) -> None:
+        for v in sorted(found, key=lambda x: x["start"]):
+            new_points = v.pop("new_points")
+            key = (v["sensor_id"], v["breach"])
+            known = self._open.get(key)
+            if known is not None and known["end"] >= since and v["start"] <= known["end"]:
+                known["end"] = max(known["end"], v["end"])
+                known["points"] += new_points
+                pick = max if v["breach"] == "usl" else min
+                known["peak"] = pick(known["peak"], v["peak"])
+                known["limit_value"] = v["limit_value"]
+            else:
+                self.recent.append(v)
+                self._open[key] = v
+
+    def _run_once(self) -> None:
+        now = datetime.now(timezone.utc)
+        interval = timedelta(seconds=settings.VIOLATION_SCAN_INTERVAL)
+        since = (self.last_run or now - interval) - interval  # one interval of overlap for late rows
+        after: dict[int, datetime] = {}
+        for (sensor_id, _), v in self._open.items():
+            after[sensor_id] = max(after.get(sensor_id, v["end"]), v["end"])
+        with SessionLocal() as db:
+            found = scan(db, since, now, after=after)
+        self._merge(found, since)
+        # only intervals reaching into the next window's overlap can still continue
+        self._open = {k: v for k, v in self._open.items() if v["end"] >= now - interval}
+        self.last_run = now
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self._run_once)
+            except Exception as e:
+                logger.warning("violation scan failed: %s", e)
+            await asyncio.sleep(settings.VIOLATION_SCAN_INTERVAL)
+
+    def start(self) -> None:
+        if settings.VIOLATION_SCAN_INTERVAL > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+violation_scanner = ViolationScanner()
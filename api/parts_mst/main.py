@@ -1,7 +1,12 @@
 """FastAPI app for parts_mst only. Parts/spare master per equipment."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from parts_mst.router import router
 
 app = FastAPI(title="edge-hmi parts_mst API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "parts_mst")
@@ -0,0 +1,35 @@
+"""Production trend from the prod_his_hourly continuous aggregate (see db/sql/init-db.sql).
+
+Reads one pre-aggregated row per (equip, hour) instead of raw prod_his rows; widths that are
+multiples of an hour are re-bucketed from the hourly rows. Real-time aggregate, so the current
+hour is included.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+HOUR = timedelta(hours=1)
+
+_HOURLY = """
+SELECT time_bucket(:width, bucket, :time_from) AS time, equip_id,
+       coalesce(sum(total_cnt), 0)::bigint AS total_cnt, coalesce(sum(good_cnt), 0)::bigint AS good_cnt,
+       coalesce(sum(defect_cnt), 0)::bigint AS defect_cnt, sum(row_cnt)::bigint AS row_cnt
+FROM prod_his_hourly
+WHERE bucket >= :time_from AND bucket < :time_to
+  {equip}
+GROUP BY 1, 2
+ORDER BY 1, 2
+"""
+
+
+def query_hourly(
+    db: Session, time_from: datetime, time_to: datetime, width: timedelta = HOUR, equip_id: int | None = None
+) -> list[dict]:
+    """Totals per (bucket, equip) over hours starting in [time_from, time_to)."""
+    params: dict = {"time_from": time_from, "time_to": time_to, "width": width}
+    equip = ""
+    if equip_id is not None:
+        params["equip_id"] = equip_id
+        equip = "AND equip_id = :equip_id"
+    return [dict(r._mapping) for r in db.execute(text(_HOURLY.format(equip=equip)), params)]
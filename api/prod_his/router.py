@@ -1,28 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from shared.config import settings
 from shared.deps import get_db
+from shared.export import EXPORT_RESPONSES, ExportFormat, export_response
 from shared.models import ProdHis as ProdHisModel
+from shared.pagination import CURSOR_RESPONSES, paginate
 
-from prod_his.schemas import ProdHisRead
+from prod_his.hourly import HOUR, query_hourly
+from prod_his.schemas import ProdHisHourly, ProdHisRead
 
 router = APIRouter(prefix="/prod_his", tags=["prod_his"])
 
 
-@router.get("", response_model=list[ProdHisRead])
+_ORDER = (ProdHisModel.id,)
+_FIELDS = ("id", "time", "equip_id", "work_order_id", "total_cnt", "good_cnt", "defect_cnt")
+
+
+def _filter(q, equip_id: int | None, work_order_id: int | None):
+    """Shared by list_ (Query) and export (Select)."""
+    if equip_id is not None:
+        q = q.filter(ProdHisModel.equip_id == equip_id)
+    if work_order_id is not None:
+        q = q.filter(ProdHisModel.work_order_id == work_order_id)
+    return q
+
+
+@router.get("", response_model=list[ProdHisRead], responses=CURSOR_RESPONSES)
 def list_(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page (keyset paging)"),
     limit: int = Query(100, le=500),
     equip_id: int | None = None,
     work_order_id: int | None = None,
 ):
-    q = db.query(ProdHisModel)
-    if equip_id is not None:
-        q = q.filter(ProdHisModel.equip_id == equip_id)
-    if work_order_id is not None:
-        q = q.filter(ProdHisModel.work_order_id == work_order_id)
-    return q.order_by(ProdHisModel.id).offset(skip).limit(limit).all()
+    q = _filter(db.query(ProdHisModel), equip_id, work_order_id)
+    return paginate(q, _ORDER, response, limit, skip, cursor)
+
+
+@router.get("/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export(
+    format: ExportFormat = "csv",
+    equip_id: int | None = None,
+    work_order_id: int | None = None,
+):
+    """Stream all matching rows as CSV or NDJSON (no row limit), ordered by id."""
+    stmt = _filter(select(*(getattr(ProdHisModel, f) for f in _FIELDS)), equip_id, work_order_id)
+    return export_response(stmt.order_by(*_ORDER), _FIELDS, format, "prod_his")
+
+
+@router.get("/hourly", response_model=list[ProdHisHourly])
+def hourly(
+    time_from: datetime,
+    time_to: datetime,
+    equip_id: int | None = None,
+    bucket: timedelta = Query(HOUR, description="Whole hours, e.g. PT1H, PT8H, P1D"),
+    db: Session = Depends(get_db),
+):
+    """Production totals per equip and bucket from the prod_his_hourly continuous aggregate (no raw-row scan)."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    if bucket < HOUR or bucket % HOUR:
+        raise HTTPException(400, "bucket must be a whole number of hours")
+    if (time_to - time_from) / bucket > settings.DOWNSAMPLE_MAX_POINTS:
+        raise HTTPException(400, f"bucket too small: window would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    return query_hourly(db, time_from, time_to, bucket, equip_id)
 
 
 @router.get("/{id}", response_model=ProdHisRead)
@@ -19,3 +19,12 @@ class ProdHisCreate(ProdHisBase):
 class ProdHisRead(ProdHisBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class ProdHisHourly(BaseModel):
+    time: datetime
+    equip_id: int
+    total_cnt: int
+    good_cnt: int
+    defect_cnt: int
+    row_cnt: int
@@ -0,0 +1,87 @@
+"""measurement response format benchmark: bytes and encode ms per format (json / columnar / msgpack / arrow).
+
+Local mode (default) encodes N synthetic rows in-process, json the way FastAPI does
+(MeasurementRead per row → JSON), the others via measurement.formats. --url measures
+end-to-end GET /measurement latency and body size per format against a running API.
+
+    cd api && export PYTHONPATH="$PWD"
+    python scripts/bench_formats.py -n 10000
+    python scripts/bench_formats.py --url http://localhost:8010 --params "sensor_id=1&limit=1000"
+"""
+import argparse
+import gzip
+import random
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from pydantic import TypeAdapter
+
+from measurement.formats import MEDIA_TYPES, render, to_columns
+from measurement.schemas import MeasurementRead
+
+FIELDS = ("time", "equip_id", "sensor_id", "value")
+FORMATS = ("json", "columnar", "msgpack", "arrow")
+_Row = namedtuple("_Row", FIELDS)
+
+
+def _rows(n: int) -> list[_Row]:
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [_Row(t0 + timedelta(seconds=i), 1, 2, random.uniform(0, 100)) for i in range(n)]
+
+
+def _encode(fmt: str, rows) -> bytes:
+    if fmt == "json":
+        adapter = TypeAdapter(list[MeasurementRead])
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return render(fmt, to_columns(rows, FIELDS)).body
+
+
+def bench_local(n: int, repeat: int) -> None:
+    rows = _rows(n)
+    print(f"{n} rows, best/median of {repeat}")
+    print(f"{'format':<10} {'bytes':>10} {'gzip':>10} {'best ms':>9} {'median ms':>10}")
+    for fmt in FORMATS:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            body = _encode(fmt, rows)
+            times.append((time.perf_counter() - t0) * 1000)
+        gz = len(gzip.compress(body, 6))
+        print(f"{fmt:<10} {len(body):>10} {gz:>10} {min(times):>9.2f} {statistics.median(times):>10.2f}")
+
+
+def bench_http(url: str, params: str, repeat: int) -> None:
+    import httpx
+
+    print(f"GET {url}/measurement?{params}, median of {repeat}")
+    print(f"{'format':<10} {'bytes':>10} {'median ms':>10}")
+    with httpx.Client(base_url=url.rstrip("/"), timeout=60.0) as client:
+        for fmt in FORMATS:
+            q = f"/measurement?{params}&format={fmt}" if fmt != "json" else f"/measurement?{params}"
+            times, size = [], 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                r = client.get(q, headers={"accept-encoding": "identity"})
+                r.raise_for_status()
+                times.append((time.perf_counter() - t0) * 1000)
+                size = len(r.content)
+            print(f"{fmt:<10} {size:>10} {statistics.median(times):>10.2f}  {r.headers.get('content-type', MEDIA_TYPES.get(fmt))}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=10000, help="rows (local mode)")
+    ap.add_argument("-r", "--repeat", type=int, default=10)
+    ap.add_argument("--url", help="table API base URL (HTTP mode)")
+    ap.add_argument("--params", default="limit=1000", help="query string for GET /measurement (HTTP mode)")
+    args = ap.parse_args()
+    if args.url:
+        bench_http(args.url, args.params, args.repeat)
+    else:
+        bench_local(args.n, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Gateway / upstream latency benchmark (p50/p95/p99).
+
+Compares a new httpx.AsyncClient per request (old proxy behaviour) with one
+pooled keep-alive client (current proxy behaviour) against the same URL.
+
+    python scripts/bench_gateway.py http://localhost:8000/line_mst -n 500 -c 10
+    python scripts/bench_gateway.py http://localhost:8010/measurement?limit=100 --mode pooled
+
+Proxy vs monolith gateway (GATEWAY_MODE=monolith on :8020), same path on both:
+
+    python scripts/bench_gateway.py http://localhost:8000/line_mst http://localhost:8020/line_mst --mode pooled
+
+Run against the gateway (:8000) to see end-to-end latency, or directly against a
+table container (:8001…) to isolate the client-side cost of the upstream hop.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, round(p / 100 * (len(s) - 1))))
+    return s[k]
+
+
+async def _run(url: str, n: int, concurrency: int, pooled: bool) -> tuple[list[float], int]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+    shared = httpx.AsyncClient(timeout=30.0) if pooled else None
+
+    async def one() -> None:
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                if shared is not None:
+                    r = await shared.get(url)
+                else:
+                    async with httpx.AsyncClient(timeout=30.0) as c:
+                        r = await c.get(url)
+                if r.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(n)))
+    finally:
+        if shared is not None:
+            await shared.aclose()
+    return latencies, errors
+
+
+def _report(label: str, latencies: list[float], errors: int, elapsed: float) -> None:
+    print(
+        f"{label} n={len(latencies):<6} err={errors:<4} "
+        f"rps={len(latencies) / elapsed:8.1f}  "
+        f"p50={_pct(latencies, 50):7.2f}ms  p95={_pct(latencies, 95):7.2f}ms  "
+        f"p99={_pct(latencies, 99):7.2f}ms  mean={statistics.fmean(latencies) if latencies else 0:7.2f}ms"
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("urls", nargs="+", metavar="url")
+    ap.add_argument("-n", type=int, default=500, help="requests per mode")
+    ap.add_argument("-c", type=int, default=10, help="concurrency")
+    ap.add_argument("--mode", choices=["fresh", "pooled", "both"], default="both")
+    ap.add_argument("--warmup", type=int, default=20)
+    args = ap.parse_args()
+
+    modes = ["fresh", "pooled"] if args.mode == "both" else [args.mode]
+    for url in args.urls:
+        print(url)
+        for mode in modes:
+            pooled = mode == "pooled"
+            await _run(url, args.warmup, args.c, pooled)
+            t0 = time.perf_counter()
+            lat, err = await _run(url, args.n, args.c, pooled)
+            _report(f"  {mode:<8}", lat, err, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""measurement ingest benchmark: rows/sec for ORM add_all vs multi-row INSERT vs COPY (vs HTTP /measurement/bulk).
+
+Needs a reachable DB (POSTGRES_* env, see api/.env.example) with at least one
+sensor_mst row. Inserted rows are deleted afterwards unless --keep.
+
+    cd api && export PYTHONPATH="$PWD"
+    python scripts/bench_ingest.py -n 20000
+    python scripts/bench_ingest.py -n 20000 --url http://localhost:8010   # also via HTTP
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+
+from shared.database import SessionLocal
+from shared.models import Measurement, SensorMst
+
+from measurement.ingest import copy_rows
+
+
+def _rows(n: int, sensors: list[tuple[int, int]], base: datetime) -> list[tuple]:
+    out = []
+    for i in range(n):
+        equip_id, sensor_id = sensors[i % len(sensors)]
+        out.append((base + timedelta(milliseconds=i), equip_id, sensor_id, float(i % 1000) / 10))
+    return out
+
+
+def bench_orm(rows):
+    with SessionLocal() as db:
+        db.add_all([Measurement(time=t, equip_id=e, sensor_id=s, value=v) for t, e, s, v in rows])
+        db.commit()
+
+
+def bench_insert(rows):
+    with SessionLocal() as db:
+        db.execute(
+            insert(Measurement),
+            [{"time": t, "equip_id": e, "sensor_id": s, "value": v} for t, e, s, v in rows],
+        )
+        db.commit()
+
+
+def bench_copy(rows):
+    with SessionLocal() as db:
+        copy_rows(db, rows, "skip")
+
+
+def _bench_http(url: str):
+    import httpx
+
+    def run(rows):
+        payload = json.dumps([[t.isoformat(), e, s, v] for t, e, s, v in rows])
+        r = httpx.post(
+            f"{url.rstrip('/')}/measurement/bulk",
+            content=payload,
+            headers={"content-type": "application/json"},
+            timeout=300.0,
+        )
+        r.raise_for_status()
+
+    return run
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=20000, help="rows per method")
+    ap.add_argument("--url", help="table API base URL for the HTTP bulk endpoint (optional)")
+    ap.add_argument("--keep", action="store_true", help="keep inserted rows")
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        sensors = [(r.equip_id, r.id) for r in db.execute(select(SensorMst.equip_id, SensorMst.id)).all()]
+    if not sensors:
+        raise SystemExit("No sensor_mst rows. Load test/sql/01-dummy-master.sql first.")
+
+    methods = [("orm_add_all", bench_orm), ("multi_row_insert", bench_insert), ("copy", bench_copy)]
+    if args.url:
+        methods.append(("http_bulk", _bench_http(args.url)))
+
+    # Distinct, recent time window per method (inside retention, before compression).
+    start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=1)
+    windows = []
+    for i, (name, fn) in enumerate(methods):
+        base = start + timedelta(minutes=10 * i)
+        rows = _rows(args.n, sensors, base)
+        t0 = time.perf_counter()
+        fn(rows)
+        elapsed = time.perf_counter() - t0
+        windows.append((base, rows[-1][0]))
+        print(f"{name:<18} rows={args.n:<8} {elapsed:8.3f}s  {args.n / elapsed:12.0f} rows/s")
+
+    if not args.keep:
+        with SessionLocal() as db:
+            for lo, hi in windows:
+                db.execute(delete(Measurement).where(Measurement.time >= lo, Measurement.time <= hi))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
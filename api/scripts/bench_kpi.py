@@ -0,0 +1,324 @@
+"""KPI batch benchmark with parity check: two ways of computing kpi_sum, timed per day.
+
+--compare loop : fn_kpi_sum_calc_loop (row-by-row) vs fn_kpi_sum_calc (set-based)
+--compare cagg : fn_kpi_sum_calc(day, false) (raw rows) vs fn_kpi_sum_calc(day, true)
+                 (prod_his_hourly / status_his_hourly continuous aggregates), plus the
+                 /prod_his/hourly and /status_his/hourly trend queries vs the same roll-up from raw rows
+--compare numpy: fn_kpi_sum_calc (SQL) vs kpi_sum.engine (NumPy, nothing written) — the parity
+                 check for the Python engine; also times the engine over the whole range in one call
+
+Needs a reachable DB (POSTGRES_* env, see api/.env.example) with init-db.sql and kpi-scheduler.sql applied.
+Seeds synthetic BENCH-* master/history data (--equips × --days, 2 shifts/day) starting at
+--date, runs both variants per day, compares the kpi_sum rows and prints timings.
+Bench data (and its kpi_sum rows) is deleted afterwards unless --keep.
+Use a date with no real data: both functions replace kpi_sum for the whole calc_date.
+
+    cd api && export PYTHONPATH="$PWD"
+    python scripts/bench_kpi.py --equips 200 --days 3
+    python scripts/bench_kpi.py --equips 100 --days 30 --compare cagg --prod-every 60 --status-every 300
+    python scripts/bench_kpi.py --equips 1000 --days 30 --compare numpy
+    python scripts/bench_kpi.py --equips 1000 --days 30 --keep   # leave data for other KPI benches
+    python scripts/bench_kpi.py --cleanup                        # remove BENCH-* data only
+"""
+import argparse
+import math
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from shared.database import SessionLocal, engine
+
+from prod_his.hourly import query_hourly as prod_hourly
+from status_his.hourly import query_hourly as status_hourly
+
+from kpi_sum.engine import compute, shift_windows
+
+KPI_COLUMNS = ("availability", "performance", "quality", "oee", "mttr", "mtbf", "uph")
+# compared between implementations: ratios plus the work order label and roll-up weights
+PARITY_COLUMNS = (
+    *KPI_COLUMNS, "work_order_id", "planned_sec", "run_sec", "total_cnt", "good_cnt", "failure_cnt", "repair_cnt"
+)
+COMPARISONS = {
+    "loop": (("loop", "SELECT fn_kpi_sum_calc_loop(:day)"), ("set", "SELECT fn_kpi_sum_calc(:day)")),
+    "cagg": (("raw", "SELECT fn_kpi_sum_calc(:day, false)"), ("cagg", "SELECT fn_kpi_sum_calc(:day, true)")),
+    "numpy": (("sql", "SELECT fn_kpi_sum_calc(:day)"), ("numpy", None)),
+}
+CAGGS = ("prod_his_hourly", "status_his_hourly")
+
+_SEED_MASTER = [
+    """
+    INSERT INTO line_mst (line_code, line_name)
+    SELECT 'BENCH-L' || lpad(i::text, 4, '0'), 'Bench line ' || i
+    FROM generate_series(1, (:equips + 9) / 10) i
+    ON CONFLICT (line_code) DO NOTHING
+    """,
+    """
+    INSERT INTO equip_mst (line_id, equip_code, name, type)
+    SELECT l.id, 'BENCH-E' || lpad(i::text, 5, '0'), 'Bench equip ' || i, 'Bench'
+    FROM generate_series(1, :equips) i
+    JOIN line_mst l ON l.line_code = 'BENCH-L' || lpad(((i - 1) / 10 + 1)::text, 4, '0')
+    ON CONFLICT (equip_code) DO NOTHING
+    """,
+    """
+    INSERT INTO kpi_cfg (equip_id, std_cycle_time, target_oee)
+    SELECT id, 20 + id % 20, 0.85 FROM equip_mst WHERE equip_code LIKE 'BENCH-E%'
+    ON CONFLICT (equip_id) DO NOTHING
+    """,
+    """
+    INSERT INTO shift_cfg (shift_name, start_time, end_time)
+    SELECT v.name, v.s, v.e FROM (VALUES ('BENCH Day', TIME '08:00', TIME '20:00'),
+                                         ('BENCH Night', TIME '20:00', TIME '08:00')) v(name, s, e)
+    WHERE NOT EXISTS (SELECT 1 FROM shift_cfg c WHERE c.shift_name = v.name)
+    """,
+    """
+    INSERT INTO worker_mst (worker_code, name) VALUES ('BENCH-W0001', 'Bench worker')
+    ON CONFLICT (worker_code) DO NOTHING
+    """,
+    """
+    INSERT INTO alarm_cfg (alarm_code, severity) VALUES ('BENCH-A01', 'Critical')
+    ON CONFLICT (alarm_code) DO NOTHING
+    """,
+    """
+    INSERT INTO maint_cfg (maint_type)
+    SELECT 'BENCH corrective' WHERE NOT EXISTS (SELECT 1 FROM maint_cfg WHERE maint_type = 'BENCH corrective')
+    """,
+]
+_BENCH_EQUIPS = "SELECT id, line_id FROM equip_mst WHERE equip_code LIKE 'BENCH-E%' ORDER BY id LIMIT :equips"
+# Per day and equip: a status segment every :status_every s (~80% Run), a prod row every
+# :prod_every s (~100 units/h), 3 alarms, 1 repair, one shift_map row per shift.
+# The LATERAL random() subqueries reference outer columns so they are evaluated per row, not once.
+_SEED_DAY = [
+    """
+    INSERT INTO shift_map (work_date, shift_def_id, worker_id, line_id, equip_id)
+    SELECT :day, s.id, (SELECT id FROM worker_mst WHERE worker_code = 'BENCH-W0001'), e.line_id, e.id
+    FROM equip_mst e
+    CROSS JOIN shift_cfg s
+    WHERE e.id = ANY(:ids) AND s.shift_name LIKE 'BENCH %'
+    """,
+    """
+    INSERT INTO status_his (equip_id, status_code, start_time, end_time)
+    SELECT e, CASE WHEN r < 0.8 THEN 'Run' WHEN r < 0.95 THEN 'Stop' ELSE 'Fault' END,
+           t, t + make_interval(secs => :status_every)
+    FROM unnest(CAST(:ids AS integer[])) e
+    CROSS JOIN generate_series(CAST(:day AS date) + TIME '08:00',
+                               CAST(:day AS date) + TIME '08:00' + INTERVAL '1 day' - make_interval(secs => :status_every),
+                               make_interval(secs => :status_every)) t
+    CROSS JOIN LATERAL (SELECT random() + e * 0 AS r) x
+    """,
+    """
+    INSERT INTO prod_his (time, equip_id, total_cnt, good_cnt, defect_cnt)
+    SELECT t, e, n, n - d, d
+    FROM unnest(CAST(:ids AS integer[])) e
+    CROSS JOIN generate_series(CAST(:day AS date) + TIME '08:00' + make_interval(secs => :prod_every) / 2,
+                               CAST(:day AS date) + TIME '08:00' + INTERVAL '1 day',
+                               make_interval(secs => :prod_every)) t
+    CROSS JOIN LATERAL (SELECT greatest(1, round((50 + random() * 100) * :prod_every / 3600.0))::int + e * 0 AS n) x
+    CROSS JOIN LATERAL (SELECT (random() * 0.05 * x.n)::int AS d) y
+    """,
+    """
+    INSERT INTO alarm_his (time, equip_id, alarm_def_id, alarm_type)
+    SELECT CAST(:day AS date) + TIME '08:00' + random() * INTERVAL '24 hours',
+           e, (SELECT id FROM alarm_cfg WHERE alarm_code = 'BENCH-A01'), 'SYSTEM'
+    FROM unnest(CAST(:ids AS integer[])) e
+    CROSS JOIN generate_series(1, 3)
+    """,
+    """
+    INSERT INTO maint_his (equip_id, maint_def_id, start_time, end_time)
+    SELECT e, (SELECT id FROM maint_cfg WHERE maint_type = 'BENCH corrective' LIMIT 1), t,
+           t + (10 + random() * 60) * INTERVAL '1 minute'
+    FROM unnest(CAST(:ids AS integer[])) e
+    CROSS JOIN LATERAL (SELECT CAST(:day AS date) + TIME '09:00' + random() * INTERVAL '20 hours' + e * INTERVAL '0' AS t) x
+    """,
+]
+_CLEANUP = [
+    "DELETE FROM kpi_sum WHERE equip_id = ANY(:ids)",
+    "DELETE FROM shift_map WHERE equip_id = ANY(:ids)",
+    "DELETE FROM maint_his WHERE equip_id = ANY(:ids)",
+    "DELETE FROM alarm_his WHERE equip_id = ANY(:ids)",
+    "DELETE FROM prod_his WHERE equip_id = ANY(:ids)",
+    "DELETE FROM status_his WHERE equip_id = ANY(:ids)",
+    "DELETE FROM kpi_dirty WHERE equip_id = ANY(:ids)",
+    "DELETE FROM kpi_cfg WHERE equip_id = ANY(:ids)",
+    "DELETE FROM equip_mst WHERE id = ANY(:ids)",
+    "DELETE FROM line_mst WHERE line_code LIKE 'BENCH-L%'",
+    "DELETE FROM shift_cfg WHERE shift_name LIKE 'BENCH %'",
+    "DELETE FROM worker_mst WHERE worker_code = 'BENCH-W0001'",
+    "DELETE FROM alarm_cfg WHERE alarm_code = 'BENCH-A01'",
+    "DELETE FROM maint_cfg WHERE maint_type = 'BENCH corrective'",
+]
+_RAW_PROD_HOURLY = """
+SELECT time_bucket(INTERVAL '1 hour', time) AS time, equip_id,
+       sum(total_cnt) AS total_cnt, sum(good_cnt) AS good_cnt, sum(defect_cnt) AS defect_cnt, count(*) AS row_cnt
+FROM prod_his WHERE time >= :time_from AND time < :time_to
+GROUP BY 1, 2 ORDER BY 1, 2
+"""
+_RAW_STATUS_HOURLY = """
+SELECT h.hour AS time, s.equip_id,
+       sum(x.sec) FILTER (WHERE s.status_code = 'Run') AS run_sec,
+       sum(x.sec) FILTER (WHERE s.status_code = 'Stop') AS stop_sec,
+       sum(x.sec) FILTER (WHERE s.status_code = 'Fault') AS fault_sec
+FROM status_his s
+CROSS JOIN LATERAL generate_series(time_bucket(INTERVAL '1 hour', s.start_time), s.end_time, INTERVAL '1 hour') h(hour)
+CROSS JOIN LATERAL (
+  SELECT EXTRACT(EPOCH FROM (LEAST(s.end_time, h.hour + INTERVAL '1 hour') - GREATEST(s.start_time, h.hour))) AS sec
+) x
+WHERE s.end_time IS NOT NULL AND s.start_time < :time_to AND s.end_time > :time_from
+  AND h.hour >= :time_from AND h.hour < :time_to AND h.hour < s.end_time
+GROUP BY 1, 2 ORDER BY 1, 2
+"""
+_KPI_ROWS = f"""
+SELECT shift_def_id, line_id, equip_id, {", ".join(PARITY_COLUMNS)}
+FROM kpi_sum WHERE calc_date = :day
+"""
+
+
+def seed(equips: int, start: date, days: int, status_every: int = 1800, prod_every: int = 3600) -> list[int]:
+    """Create BENCH-* masters and `days` days of history from `start`. → bench equip ids."""
+    with SessionLocal() as db:
+        for sql in _SEED_MASTER:
+            db.execute(text(sql), {"equips": equips})
+        ids = [r.id for r in db.execute(text(_BENCH_EQUIPS), {"equips": equips})]
+        db.commit()
+        for i in range(days):
+            for sql in _SEED_DAY:
+                params = {"day": start + timedelta(days=i), "ids": ids, "status_every": status_every, "prod_every": prod_every}
+                db.execute(text(sql), params)
+            db.commit()
+    return ids
+
+
+def cleanup() -> None:
+    with SessionLocal() as db:
+        ids = [r.id for r in db.execute(text("SELECT id FROM equip_mst WHERE equip_code LIKE 'BENCH-E%'"))]
+        for sql in _CLEANUP:
+            db.execute(text(sql), {"ids": ids})
+        db.commit()
+
+
+def kpi_rows(day: date) -> dict[tuple, tuple]:
+    """kpi_sum rows for day → {(shift_def_id, line_id, equip_id): PARITY_COLUMNS values}."""
+    with SessionLocal() as db:
+        return {tuple(r[:3]): tuple(r[3:]) for r in db.execute(text(_KPI_ROWS), {"day": day})}
+
+
+def diff(a: dict[tuple, tuple], b: dict[tuple, tuple], tol: float = 1e-9) -> list[str]:
+    """Human-readable differences between two kpi_rows() results."""
+    out = [f"only in first: {k}" for k in a.keys() - b.keys()]
+    out += [f"only in second: {k}" for k in b.keys() - a.keys()]
+    for k in a.keys() & b.keys():
+        for col, x, y in zip(PARITY_COLUMNS, a[k], b[k]):
+            if (x is None) != (y is None) or (x is not None and not math.isclose(x, y, rel_tol=tol, abs_tol=tol)):
+                out.append(f"{k} {col}: {x} != {y}")
+    return out
+
+
+def run_calc(sql: str | None, day: date) -> tuple[float, dict[tuple, tuple]]:
+    """Compute KPIs for day → (seconds, kpi_rows). sql=None: kpi_sum.engine (in memory, not stored)."""
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        if sql is None:
+            rows = compute(db, shift_windows(db, day, day))
+            elapsed = time.perf_counter() - t0
+            return elapsed, {(r["shift_def_id"], r["line_id"], r["equip_id"]): tuple(r[c] for c in PARITY_COLUMNS) for r in rows}
+        db.execute(text(sql), {"day": day})
+        db.commit()
+        elapsed = time.perf_counter() - t0
+    return elapsed, kpi_rows(day)
+
+
+def bench_engine_range(start: date, end: date) -> None:
+    """kpi_sum.engine over all days at once: one load per source table, one vectorized pass."""
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        w = shift_windows(db, start, end)
+        t1 = time.perf_counter()
+        rows = compute(db, w)
+        t2 = time.perf_counter()
+    print(f"engine {start}..{end}: {len(rows)} rows, windows {t1 - t0:.3f}s + load/compute {t2 - t1:.3f}s")
+
+
+def refresh_caggs(start: date, end: date) -> float:
+    """Materialize the hourly continuous aggregates over [start, end) (must run outside a transaction)."""
+    t0 = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for view in CAGGS:
+            conn.execute(text(f"CALL refresh_continuous_aggregate('{view}', :start, :end)"), {"start": start, "end": end})
+    return time.perf_counter() - t0
+
+
+def _timed(fn) -> tuple[float, int]:
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        n = len(fn(db))
+        return time.perf_counter() - t0, n
+
+
+def bench_trends(start: date, end: date) -> None:
+    """Hourly prod / status roll-up over [start, end): raw hypertables vs continuous aggregates."""
+    params = {"time_from": start, "time_to": end}
+    cases = [
+        ("prod hourly", _RAW_PROD_HOURLY, lambda db: prod_hourly(db, start, end)),
+        ("status hourly", _RAW_STATUS_HOURLY, lambda db: status_hourly(db, start, end)),
+    ]
+    print(f"{'trend':<16}{'rows':>8}{'raw s':>10}{'cagg s':>10}{'speedup':>9}")
+    for name, raw_sql, cagg_fn in cases:
+        t_raw, n = _timed(lambda db: db.execute(text(raw_sql), params).all())
+        t_cagg, _ = _timed(cagg_fn)
+        print(f"{name:<16}{n:>8}{t_raw:>10.3f}{t_cagg:>10.3f}{t_raw / t_cagg if t_cagg else 0:>8.1f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--equips", type=int, default=200)
+    ap.add_argument("--days", type=int, default=3)
+    ap.add_argument("--date", type=date.fromisoformat, default=date(2001, 1, 1), help="first bench day")
+    ap.add_argument("--compare", choices=sorted(COMPARISONS), default="loop")
+    ap.add_argument("--status-every", type=int, default=1800, help="seconds per generated status segment")
+    ap.add_argument("--prod-every", type=int, default=3600, help="seconds between generated prod_his rows")
+    ap.add_argument("--no-seed", action="store_true", help="reuse BENCH-* data left by --keep")
+    ap.add_argument("--keep", action="store_true", help="keep bench data")
+    ap.add_argument("--cleanup", action="store_true", help="only delete BENCH-* data")
+    args = ap.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if not args.no_seed:
+        t0 = time.perf_counter()
+        seed(args.equips, args.date, args.days, args.status_every, args.prod_every)
+        print(f"seeded {args.equips} equips × {args.days} days in {time.perf_counter() - t0:.1f}s")
+    (a, sql_a), (b, sql_b) = COMPARISONS[args.compare]
+    end = args.date + timedelta(days=args.days + 1)  # night shift of the last day ends the next morning
+    try:
+        if args.compare == "cagg":
+            print(f"refreshed continuous aggregates in {refresh_caggs(args.date, end):.1f}s")
+            bench_trends(args.date, end)
+        total = {a: 0.0, b: 0.0}
+        mismatches = 0
+        print(f"{'day':<12}{'rows':>8}{a + ' s':>10}{b + ' s':>10}{'speedup':>9}  parity")
+        for i in range(args.days):
+            day = args.date + timedelta(days=i)
+            t_a, ref = run_calc(sql_a, day)
+            t_b, got = run_calc(sql_b, day)
+            problems = diff(ref, got)
+            mismatches += len(problems)
+            total[a] += t_a
+            total[b] += t_b
+            print(
+                f"{day.isoformat():<12}{len(ref):>8}{t_a:>10.3f}{t_b:>10.3f}"
+                f"{t_a / t_b if t_b else 0:>8.1f}x  {'ok' if not problems else f'{len(problems)} diffs'}"
+            )
+            for p in problems[:5]:
+                print("   ", p)
+        speedup = total[a] / total[b] if total[b] else 0
+        print(f"{'total':<12}{'':>8}{total[a]:>10.3f}{total[b]:>10.3f}{speedup:>8.1f}x  mismatches={mismatches}")
+        if args.compare == "numpy":
+            bench_engine_range(args.date, args.date + timedelta(days=args.days - 1))
+    finally:
+        if not args.keep:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""KPI backfill: re-run fn_kpi_sum_calc for every day in [--from, --to] on a bounded pool of DB connections.
+
+Each day is one transaction on its own connection: fn_kpi_sum_calc(day) + a kpi_backfill_log row.
+Days run in parallel (--workers, at most DB_POOL_SIZE + DB_MAX_OVERFLOW). fn_kpi_sum_calc takes a
+per-date advisory lock before its DELETE, so workers never block each other (distinct dates) and
+queue behind the nightly / incremental job on the same date instead of deadlocking with it.
+
+Resumable: finished days are logged under --run (default "<from>..<to>") and skipped when the same
+command is run again; failed or interrupted days are not logged and are retried. --restart forgets
+the run's log first. --cagg refreshes the hourly continuous aggregates over the range and reads
+full hours from them (fn_kpi_sum_calc(day, true)).
+
+Needs a reachable DB (POSTGRES_* env, see api/.env.example) with init-db.sql and kpi-scheduler.sql applied.
+
+    cd api && export PYTHONPATH="$PWD"
+    python scripts/kpi_backfill.py --from 2025-01-01 --to 2025-03-31 --workers 4
+    python scripts/kpi_backfill.py --from 2025-01-01 --to 2025-03-31 --workers 4   # after Ctrl-C: resumes
+    python scripts/kpi_backfill.py --from 2025-01-01 --to 2025-03-31 --restart --cagg
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from shared.config import settings
+from shared.database import SessionLocal, engine
+
+CAGGS = ("prod_his_hourly", "status_his_hourly")
+
+_DONE = "SELECT calc_date FROM kpi_backfill_log WHERE run_id = :run AND calc_date BETWEEN :date_from AND :date_to"
+_CALC = "SELECT fn_kpi_sum_calc(:day, :cagg)"
+_ROWS = "SELECT count(*) FROM kpi_sum WHERE calc_date = :day"
+_LOG = """
+INSERT INTO kpi_backfill_log (run_id, calc_date, row_cnt, elapsed_sec)
+VALUES (:run, :day, :rows, :elapsed)
+ON CONFLICT (run_id, calc_date) DO UPDATE
+  SET row_cnt = EXCLUDED.row_cnt, elapsed_sec = EXCLUDED.elapsed_sec, done_at = now()
+"""
+
+
+def pending_days(run: str, date_from: date, date_to: date) -> tuple[list[date], int]:
+    """→ (days not yet logged for run, number already done)."""
+    with SessionLocal() as db:
+        done = {r[0] for r in db.execute(text(_DONE), {"run": run, "date_from": date_from, "date_to": date_to})}
+    days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    return [d for d in days if d not in done], len(done)
+
+
+def restart(run: str) -> None:
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM kpi_backfill_log WHERE run_id = :run"), {"run": run})
+        db.commit()
+
+
+def refresh_caggs(date_from: date, date_to: date) -> float:
+    """Materialize the hourly aggregates over the range (night shift of the last day ends the next morning)."""
+    t0 = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for view in CAGGS:
+            conn.execute(
+                text(f"CALL refresh_continuous_aggregate('{view}', :start, :end)"),
+                {"start": date_from, "end": date_to + timedelta(days=2)},
+            )
+    return time.perf_counter() - t0
+
+
+def calc_day(run: str, day: date, cagg: bool) -> tuple[int, float]:
+    """Recalculate one day and log it in the same transaction. → (kpi_sum rows, seconds)."""
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        db.execute(text(_CALC), {"day": day, "cagg": cagg})
+        rows = db.execute(text(_ROWS), {"day": day}).scalar_one()
+        elapsed = time.perf_counter() - t0
+        db.execute(text(_LOG), {"run": run, "day": day, "rows": rows, "elapsed": elapsed})
+        db.commit()
+    return rows, elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True, help="first calc_date")
+    ap.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True, help="last calc_date (inclusive)")
+    ap.add_argument("--workers", type=int, default=4, help="parallel days = DB connections")
+    ap.add_argument("--run", help='resume key in kpi_backfill_log (default "<from>..<to>")')
+    ap.add_argument("--restart", action="store_true", help="forget logged days of this run and redo all")
+    ap.add_argument("--cagg", action="store_true", help="refresh and read the hourly continuous aggregates")
+    args = ap.parse_args()
+
+    if args.date_to < args.date_from:
+        ap.error("--to must not be before --from")
+    max_conn = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    if not 1 <= args.workers <= max_conn:
+        ap.error(f"--workers must be between 1 and {max_conn} (DB_POOL_SIZE + DB_MAX_OVERFLOW)")
+    run = args.run or f"{args.date_from}..{args.date_to}"
+
+    if args.restart:
+        restart(run)
+    days, done = pending_days(run, args.date_from, args.date_to)
+    total = len(days) + done
+    print(f"run {run}: {total} days, {done} already done, {len(days)} to go, {args.workers} workers")
+    if not days:
+        return 0
+    if args.cagg:
+        print(f"refreshed continuous aggregates in {refresh_caggs(args.date_from, args.date_to):.1f}s")
+
+    t0 = time.perf_counter()
+    busy = 0.0
+    failed: list[date] = []
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = {pool.submit(calc_day, run, day, args.cagg): day for day in days}
+        for n, fut in enumerate(as_completed(futures), 1):
+            day = futures[fut]
+            eta = (time.perf_counter() - t0) / n * (len(days) - n)
+            try:
+                rows, elapsed = fut.result()
+            except Exception as e:
+                failed.append(day)
+                print(f"[{done + len(failed):>5}/{total}] {day}  FAILED: {e}", file=sys.stderr)
+                continue
+            done += 1
+            busy += elapsed
+            print(f"[{done + len(failed):>5}/{total}] {day}  rows={rows:<7} {elapsed:8.3f}s  eta {eta:6.0f}s")
+    except KeyboardInterrupt:
+        pool.shutdown(wait=True, cancel_futures=True)
+        print("interrupted: finished days are logged, rerun the same command to resume", file=sys.stderr)
+        return 130
+    pool.shutdown()
+
+    wall = time.perf_counter() - t0
+    print(f"done in {wall:.1f}s (day time {busy:.1f}s, {busy / wall if wall else 0:.1f}x parallel), failed {len(failed)}")
+    if failed:
+        print("failed days (rerun to retry): " + ", ".join(d.isoformat() for d in sorted(failed)), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -45,13 +45,14 @@ declare -A API_MAP=(
   [maint_his]="maint_his/Dockerfile:btx/edge-hmi-api-maint-his"
   [shift_map]="shift_map/Dockerfile:btx/edge-hmi-api-shift-map"
   [hmi-api]="hmi_api/Dockerfile:btx/edge-hmi-api"
+  [hmi-api-monolith]="hmi_api/Dockerfile.monolith:btx/edge-hmi-api-monolith"
   [work_order]="work_order/Dockerfile:btx/edge-hmi-api-work-order"
   [defect_code_mst]="defect_code_mst/Dockerfile:btx/edge-hmi-api-defect-code-mst"
   [defect_his]="defect_his/Dockerfile:btx/edge-hmi-api-defect-his"
   [parts_mst]="parts_mst/Dockerfile:btx/edge-hmi-api-parts-mst"
 )
 
-ALL_KEYS=(line_mst equip_mst sensor_mst kpi_sum worker_mst shift_cfg kpi_cfg alarm_cfg maint_cfg work_order measurement status_his prod_his alarm_his maint_his shift_map defect_code_mst defect_his parts_mst hmi-api)
+ALL_KEYS=(line_mst equip_mst sensor_mst kpi_sum worker_mst shift_cfg kpi_cfg alarm_cfg maint_cfg work_order measurement status_his prod_his alarm_his maint_his shift_map defect_code_mst defect_his parts_mst hmi-api hmi-api-monolith)
 
 resolve_targets() {
   if [ ${#REQUESTED[@]} -eq 0 ]; then
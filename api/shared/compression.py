@@ -0,0 +1,133 @@
+"""Response compression negotiated from Accept-Encoding: gzip, or brotli when the `brotli` module is installed.
+
+Responses that already carry Content-Encoding (e.g. compressed upstream bodies relayed
+by the gateway) are passed through untouched, so nothing is encoded twice. Bodies
+smaller than COMPRESSION_MIN_SIZE and non-compressible content types are sent as-is.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from shared.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+_COMPRESSIBLE = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/msgpack",
+    "application/vnd.apache.arrow",
+    "image/svg+xml",
+)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick "br" or "gzip" from an Accept-Encoding header (q=0 excluded)."""
+    offered: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name] = q
+    star = offered.get("*", 0.0)
+    if brotli is not None and settings.COMPRESSION_BROTLI and offered.get("br", star) > 0:
+        return "br"
+    if offered.get("gzip", star) > 0:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.compress, self._finish = self._c.process, self._c.finish
+        else:
+            self._c = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress, self._finish = self._c.compress, self._c.flush
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int | None = None) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: dict | None = None
+        self.passthrough = False
+        self.encoder: _Encoder | None = None
+        self.send = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    async def _send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            ctype = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or not ctype.startswith(_COMPRESSIBLE)
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.encoder = _Encoder(self.encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            body = self.encoder.compress(body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body += self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        body = self.encoder.compress(body)
+        if not more_body:
+            body += self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
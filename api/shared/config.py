@@ -9,6 +9,36 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "admin"
     POSTGRES_PASSWORD: str = ""  # Must be set via env; do not hardcode
     POSTGRES_SCHEMA: str = "core"
+    # SQLAlchemy pool (one engine per process; size up for hmi_api monolith mode)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # measurement POST /measurement/bulk
+    INGEST_MAX_ROWS: int = 100_000
+    # measurement GET /measurement/downsample
+    DOWNSAMPLE_DEFAULT_POINTS: int = 500
+    DOWNSAMPLE_MAX_POINTS: int = 5000
+    DOWNSAMPLE_LTTB_MAX_INPUT: int = 200_000
+    # measurement GET /measurement/frame: max sensor columns per request
+    FRAME_MAX_SENSORS: int = 32
+    # measurement GET /measurement/golden: cached golden envelopes (LRU entries, max age in seconds; 0 = no expiry)
+    GOLDEN_CACHE_SIZE: int = 64
+    GOLDEN_CACHE_TTL: float = 600.0
+    # measurement GET /measurement/violations: sensor_mst limits reload, optional background scan (0 = off)
+    LIMITS_CACHE_TTL: float = 60.0
+    VIOLATION_SCAN_INTERVAL: float = 0.0
+    VIOLATION_RECENT_MAX: int = 1000
+    # measurement GET /measurement/latest: incremental refresh of the in-memory last-value table
+    LATEST_REFRESH_INTERVAL: float = 10.0
+    # kpi_sum GET /kpi_sum/compute: max days per in-memory KPI computation
+    KPI_COMPUTE_MAX_DAYS: int = 92
+    # GET /<table>/export: rows fetched per server-side cursor round trip (= rows per chunk)
+    EXPORT_YIELD_PER: int = 5000
+    # Response compression (shared.compression): gzip, br if `brotli` is installed
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI: bool = True
+    COMPRESSION_BROTLI_QUALITY: int = 4
 
     @property
     def database_url(self) -> str:
@@ -1,15 +1,54 @@
 """SQLAlchemy engine and session."""
+import time
+
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from shared.config import settings
+from shared.metrics import DB_POOL_WAIT
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time (db_pool_wait_seconds)."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - t0)
+
+
+class PoolCollector:
+    """Scrape-time pool gauges for /metrics (no per-query cost)."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        yield GaugeMetricFamily("db_pool_size", "Configured pool size", value=pool.size())
+        yield GaugeMetricFamily("db_pool_checked_out", "Connections checked out", value=pool.checkedout())
+        yield GaugeMetricFamily("db_pool_checked_in", "Idle connections in pool", value=pool.checkedin())
+        yield GaugeMetricFamily(
+            "db_pool_overflow", "Overflow connections (negative = unused pool slots)", value=pool.overflow()
+        )
+
 
 engine = create_engine(
     settings.database_url,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     echo=False,
     connect_args={"options": f"-c search_path={settings.POSTGRES_SCHEMA},public"},
 )
+REGISTRY.register(PoolCollector(engine))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
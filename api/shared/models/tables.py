@@ -263,3 +263,9 @@ class KpiSum(Base):
     mttr: Mapped[float | None] = mapped_column(Float)
     mtbf: Mapped[float | None] = mapped_column(Float)
     uph: Mapped[float | None] = mapped_column(Float)
+    planned_sec: Mapped[float | None] = mapped_column(Float)
+    run_sec: Mapped[float | None] = mapped_column(Float)
+    total_cnt: Mapped[int | None] = mapped_column(Integer)
+    good_cnt: Mapped[int | None] = mapped_column(Integer)
+    failure_cnt: Mapped[int | None] = mapped_column(Integer)
+    repair_cnt: Mapped[int | None] = mapped_column(Integer)
@@ -1,10 +1,15 @@
 """FastAPI app for shift_map only. List + Get + Create."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from shift_map.router import router
 
 app = FastAPI(title="edge-hmi shift_map API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "shift_map")
 
 
 @app.get("/")
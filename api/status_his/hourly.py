@@ -0,0 +1,61 @@
+"""Run/Stop/Fault seconds per equip from the status_his_hourly continuous aggregate (see db/sql/init-db.sql).
+
+Segments are split at hour boundaries, so no hour reports more than 3600 s per status. The
+aggregate holds the in-hour part of each closed segment; the part running past its start hour
+(up to max_end) is spread over the following hours here, looking back at most MAX_SEGMENT.
+Segments still open are reported as open_segments. Widths that are multiples of an hour are
+re-bucketed from the hourly rows.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+HOUR = timedelta(hours=1)
+MAX_SEGMENT = timedelta(days=7)  # same look-back as fn_kpi_sum_insert(..., p_use_cagg => true)
+
+_HOURLY = """
+WITH seg AS (
+  SELECT bucket, equip_id, status_code, dur_sec, seg_cnt, open_cnt
+  FROM status_his_hourly
+  WHERE bucket >= :time_from AND bucket < :time_to
+    {equip}
+  UNION ALL
+  -- carry-over: part of a closed segment past the hour it started in, one row per later hour
+  SELECT h.hour, c.equip_id, c.status_code,
+         EXTRACT(EPOCH FROM (LEAST(c.max_end, h.hour + INTERVAL '1 hour') - h.hour)), 0, 0
+  FROM status_his_hourly c
+  CROSS JOIN LATERAL generate_series(
+    c.bucket + INTERVAL '1 hour', LEAST(c.max_end, :time_to), INTERVAL '1 hour'
+  ) h(hour)
+  WHERE c.bucket >= :look_back AND c.bucket < :time_to
+    AND c.max_end > c.bucket + INTERVAL '1 hour'
+    AND h.hour >= :time_from AND h.hour < :time_to AND h.hour < c.max_end
+    {equip_c}
+)
+SELECT time_bucket(:width, bucket, :time_from) AS time, equip_id,
+       coalesce(sum(dur_sec) FILTER (WHERE status_code = 'Run'), 0)::float8 AS run_sec,
+       coalesce(sum(dur_sec) FILTER (WHERE status_code = 'Stop'), 0)::float8 AS stop_sec,
+       coalesce(sum(dur_sec) FILTER (WHERE status_code = 'Fault'), 0)::float8 AS fault_sec,
+       coalesce(sum(dur_sec) FILTER (WHERE status_code IS NULL OR status_code NOT IN ('Run', 'Stop', 'Fault')), 0)::float8
+           AS other_sec,
+       sum(seg_cnt)::bigint AS segments,
+       sum(open_cnt)::bigint AS open_segments
+FROM seg
+GROUP BY 1, 2
+ORDER BY 1, 2
+"""
+
+
+def query_hourly(
+    db: Session, time_from: datetime, time_to: datetime, width: timedelta = HOUR, equip_id: int | None = None
+) -> list[dict]:
+    """Seconds per status per (bucket, equip) in [time_from, time_to); segments/open_segments count by start hour."""
+    params: dict = {"time_from": time_from, "time_to": time_to, "width": width, "look_back": time_from - MAX_SEGMENT}
+    equip = equip_c = ""
+    if equip_id is not None:
+        params["equip_id"] = equip_id
+        equip = "AND equip_id = :equip_id"
+        equip_c = "AND c.equip_id = :equip_id"
+    sql = _HOURLY.format(equip=equip, equip_c=equip_c)
+    return [dict(r._mapping) for r in db.execute(text(sql), params)]
@@ -1,10 +1,15 @@
 """FastAPI app for status_his only (hypertable). List + Get + Create."""
 from fastapi import FastAPI
 
+from shared.compression import CompressionMiddleware
+from shared.metrics import instrument
+
 from status_his.router import router
 
 app = FastAPI(title="edge-hmi status_his API", version="1.0.1")
 app.include_router(router)
+app.add_middleware(CompressionMiddleware)
+instrument(app, "status_his")
 
 
 @app.get("/")
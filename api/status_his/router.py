@@ -1,33 +1,80 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from shared.config import settings
 from shared.deps import get_db
+from shared.export import EXPORT_RESPONSES, ExportFormat, export_response
 from shared.models import StatusHis as StatusHisModel
+from shared.pagination import CURSOR_RESPONSES, paginate
 
-from status_his.schemas import StatusHisRead
+from status_his.hourly import HOUR, query_hourly
+from status_his.schemas import StatusHisHourly, StatusHisRead
 
 router = APIRouter(prefix="/status_his", tags=["status_his"])
 
 
-@router.get("", response_model=list[StatusHisRead])
+_ORDER = (StatusHisModel.start_time, StatusHisModel.id)
+_FIELDS = ("id", "equip_id", "status_code", "start_time", "end_time")
+
+
+def _filter(q, equip_id: int | None, start_time_from: datetime | None, start_time_to: datetime | None):
+    """Shared by list_ (Query) and export (Select)."""
+    if equip_id is not None:
+        q = q.filter(StatusHisModel.equip_id == equip_id)
+    if start_time_from is not None:
+        q = q.filter(StatusHisModel.start_time >= start_time_from)
+    if start_time_to is not None:
+        q = q.filter(StatusHisModel.start_time <= start_time_to)
+    return q
+
+
+@router.get("", response_model=list[StatusHisRead], responses=CURSOR_RESPONSES)
 def list_(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page (keyset paging)"),
     limit: int = Query(100, le=500),
     equip_id: int | None = None,
     start_time_from: datetime | None = None,
     start_time_to: datetime | None = None,
 ):
-    q = db.query(StatusHisModel)
-    if equip_id is not None:
-        q = q.filter(StatusHisModel.equip_id == equip_id)
-    if start_time_from is not None:
-        q = q.filter(StatusHisModel.start_time >= start_time_from)
-    if start_time_to is not None:
-        q = q.filter(StatusHisModel.start_time <= start_time_to)
-    return q.order_by(StatusHisModel.start_time).offset(skip).limit(limit).all()
+    q = _filter(db.query(StatusHisModel), equip_id, start_time_from, start_time_to)
+    return paginate(q, _ORDER, response, limit, skip, cursor)
+
+
+@router.get("/export", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+def export(
+    format: ExportFormat = "csv",
+    equip_id: int | None = None,
+    start_time_from: datetime | None = None,
+    start_time_to: datetime | None = None,
+):
+    """Stream all matching rows as CSV or NDJSON (no row limit), ordered by (start_time, id)."""
+    stmt = _filter(select(*(getattr(StatusHisModel, f) for f in _FIELDS)), equip_id, start_time_from, start_time_to)
+    return export_response(stmt.order_by(*_ORDER), _FIELDS, format, "status_his")
+
+
+@router.get("/hourly", response_model=list[StatusHisHourly])
+def hourly(
+    time_from: datetime,
+    time_to: datetime,
+    equip_id: int | None = None,
+    bucket: timedelta = Query(HOUR, description="Whole hours, e.g. PT1H, PT8H, P1D"),
+    db: Session = Depends(get_db),
+):
+    """Run/Stop/Fault seconds per equip and bucket from the status_his_hourly continuous aggregate (no raw-row scan)."""
+    if time_to <= time_from:
+        raise HTTPException(400, "time_to must be after time_from")
+    if bucket < HOUR or bucket % HOUR:
+        raise HTTPException(400, "bucket must be a whole number of hours")
+    if (time_to - time_from) / bucket > settings.DOWNSAMPLE_MAX_POINTS:
+        raise HTTPException(400, f"bucket too small: window would exceed {settings.DOWNSAMPLE_MAX_POINTS} buckets")
+    return query_hourly(db, time_from, time_to, bucket, equip_id)
 
 
 @router.get("/{id}", response_model=StatusHisRead)
@@ -17,3 +17,14 @@ class StatusHisCreate(StatusHisBase):
 class StatusHisRead(StatusHisBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class StatusHisHourly(BaseModel):
+    time: datetime
+    equip_id: int
+    run_sec: float
+    stop_sec: float
+    fault_sec: float
+    other_sec: float
+    segments: int
+    open_segments: int
@@ -0,0 +1,125 @@
+"""kpi_sum.engine.evaluate on hand-built arrays, without a DB.
+
+Expected values are worked out by hand from fn_kpi_sum_insert (db/sql/kpi-scheduler.sql):
+run time is the overlap of 'Run' segments with [win_start, win_end) (open segments up to
+win_end), events count when win_start <= time < win_end, maint by start time.
+"""
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+from kpi_sum.engine import _NO_WO, _OPEN, Windows, evaluate, to_us
+
+D = date(2025, 1, 6)
+
+
+def t(day: int, hour: int, minute: int = 0, second: int = 0) -> int:
+    return to_us(datetime(2025, 1, day, hour, minute, second, tzinfo=timezone.utc))
+
+
+def windows(*specs) -> Windows:
+    """specs: (shift_def_id, equip_id, std_cycle_time, win_start, win_end)."""
+    rows = [
+        {"calc_date": D, "shift_def_id": s, "line_id": 1, "equip_id": e, "std_cycle_time": ct}
+        for s, e, ct, _, _ in specs
+    ]
+    return Windows(rows, [x[3] for x in specs], [x[4] for x in specs])
+
+
+def arr(rows, width: int) -> np.ndarray:
+    return np.array(rows, dtype=np.int64).reshape(len(rows), width)
+
+
+def run_eval(w, run=(), prod=(), alarm=(), maint=(), **kw) -> list[dict]:
+    return evaluate(w, arr(run, 3), arr(prod, 5), arr(alarm, 2), arr(maint, 3), **kw)
+
+
+def test_night_shift_across_midnight_with_straddling_segments():
+    # Night shift 22:00 (day 6) → 06:00 (day 7): planned 8 h = 28800 s
+    w = windows((3, 1, 60.0, t(6, 22), t(7, 6)))
+    (r,) = run_eval(
+        w,
+        run=[
+            (1, t(6, 21), t(6, 23)),  # straddles win_start: 3600 s inside
+            (1, t(7, 1), t(7, 2)),  # after midnight: 3600 s
+            (1, t(7, 5), t(7, 7)),  # straddles win_end: 3600 s inside
+            (1, t(6, 12), t(6, 13)),  # before the window
+        ],
+        prod=[
+            (1, t(6, 21, 30), 10, 10, 9),  # before win_start
+            (1, t(6, 23, 30), 100, 90, 7),
+            (1, t(7, 5, 59, 59), 50, 50, 8),
+            (1, t(7, 6), 1000, 1000, 8),  # at win_end: excluded
+        ],
+        alarm=[(1, t(6, 22)), (1, t(7, 6))],  # win_start included, win_end excluded
+        maint=[(1, t(6, 23), t(6, 23, 30)), (1, t(7, 4), t(7, 5)), (1, t(7, 6), t(7, 7))],
+    )
+    assert r["planned_sec"] == 28800.0
+    assert r["run_sec"] == 10800.0
+    assert r["availability"] == pytest.approx(0.375)
+    assert r["total_cnt"] == 150 and r["good_cnt"] == 140
+    assert r["performance"] == pytest.approx(150 * 60.0 / 10800)  # 0.8333
+    assert r["quality"] == pytest.approx(140 / 150)
+    assert r["oee"] == pytest.approx(0.375 * (150 * 60.0 / 10800) * (140 / 150))
+    assert r["failure_cnt"] == 1
+    assert r["mtbf"] == pytest.approx(3.0)  # 3 run hours / 1 failure
+    assert r["repair_cnt"] == 2
+    assert r["mttr"] == pytest.approx(45.0)  # (30 + 60) / 2 minutes
+    assert r["uph"] == pytest.approx(17.5)  # 140 good / 8 h
+    assert r["work_order_id"] == 7  # 100 of 150 pieces
+
+
+def test_open_segments_run_to_window_end():
+    day = windows((1, 1, 30.0, t(6, 6), t(6, 14)), (2, 1, 30.0, t(6, 14), t(6, 22)))
+    rows = run_eval(day, run=[(1, t(6, 5), _OPEN)])  # open since before the day shift
+    assert [r["run_sec"] for r in rows] == [28800.0, 28800.0]
+    assert [r["availability"] for r in rows] == [1.0, 1.0]
+
+    rows = run_eval(day, run=[(1, t(6, 6), t(6, 10)), (1, t(6, 18), _OPEN)])
+    assert [r["run_sec"] for r in rows] == [14400.0, 14400.0]
+    assert [r["availability"] for r in rows] == [0.5, 0.5]
+
+
+def test_segment_longer_than_window_and_other_equips():
+    w = windows((1, 1, None, t(6, 6), t(6, 14)), (1, 2, None, t(6, 6), t(6, 14)))
+    rows = run_eval(
+        w,
+        run=[
+            (1, t(5, 20), t(6, 20)),  # covers the whole window
+            (1, t(6, 8), t(6, 9)),  # overlaps the long one: summed like the SQL (avail capped at 1)
+            (2, t(6, 13), t(6, 15)),
+            (3, t(6, 6), t(6, 14)),  # equip without a window
+        ],
+        prod=[(1, t(6, 7), 5, 5, _NO_WO), (3, t(6, 7), 99, 99, 4)],
+    )
+    assert rows[0]["run_sec"] == 32400.0 and rows[0]["availability"] == 1.0
+    assert rows[0]["performance"] == 0.0  # no std_cycle_time
+    assert rows[0]["work_order_id"] is None  # prod rows without work order
+    assert rows[1]["run_sec"] == 3600.0 and rows[1]["availability"] == 0.125
+    assert rows[1]["total_cnt"] == 0
+
+
+def test_zero_planned_and_zero_total():
+    empty = run_eval(windows((1, 1, 60.0, t(6, 6), t(6, 6))), run=[(1, t(6, 5), t(6, 7))])[0]
+    assert empty["planned_sec"] == 0.0 and empty["run_sec"] == 0.0
+    assert empty["availability"] == 0.0 and empty["uph"] is None
+
+    (r,) = run_eval(windows((1, 1, 60.0, t(6, 6), t(6, 14))), run=[(1, t(6, 6), t(6, 10))])
+    assert r["total_cnt"] == 0 and r["good_cnt"] == 0
+    assert r["performance"] == 0.0 and r["quality"] == 0.0 and r["oee"] == 0.0
+    assert r["uph"] == 0.0
+    assert r["mttr"] is None and r["mtbf"] is None
+    assert r["failure_cnt"] == 0 and r["repair_cnt"] == 0
+
+
+def test_std_cycle_time_override_and_work_order_tie():
+    w = windows((1, 1, None, t(6, 6), t(6, 14)))
+    (r,) = run_eval(
+        w,
+        run=[(1, t(6, 6), t(6, 7))],
+        prod=[(1, t(6, 7), 20, 20, 12), (1, t(6, 8), 20, 18, 11)],
+        std_cycle_time=45.0,
+    )
+    assert r["performance"] == pytest.approx(0.5)  # 40 pieces × 45 s / 3600 s
+    assert r["work_order_id"] == 11  # equal output: lowest id, like ORDER BY … work_order_id
@@ -337,7 +337,13 @@ CREATE TABLE IF NOT EXISTS kpi_sum (
     oee FLOAT,
     mttr FLOAT,
     mtbf FLOAT,
-    uph FLOAT
+    uph FLOAT,
+    planned_sec FLOAT,
+    run_sec FLOAT,
+    total_cnt INTEGER,
+    good_cnt INTEGER,
+    failure_cnt INTEGER,
+    repair_cnt INTEGER
 );
 COMMENT ON TABLE kpi_sum IS 'KPI aggregates by date/shift/line/equip/work order';
 COMMENT ON COLUMN kpi_sum.calc_date IS 'Aggregation date';
@@ -352,6 +358,12 @@ COMMENT ON COLUMN kpi_sum.oee IS 'OEE';
 COMMENT ON COLUMN kpi_sum.mttr IS 'Mean time to repair';
 COMMENT ON COLUMN kpi_sum.mtbf IS 'Mean time between failures';
 COMMENT ON COLUMN kpi_sum.uph IS 'Units per hour';
+COMMENT ON COLUMN kpi_sum.planned_sec IS 'Planned (shift window) seconds; roll-up weight';
+COMMENT ON COLUMN kpi_sum.run_sec IS 'Run seconds in the window; roll-up weight';
+COMMENT ON COLUMN kpi_sum.total_cnt IS 'Total count in the window; roll-up weight';
+COMMENT ON COLUMN kpi_sum.good_cnt IS 'Good count in the window';
+COMMENT ON COLUMN kpi_sum.failure_cnt IS 'Alarm (failure) count in the window';
+COMMENT ON COLUMN kpi_sum.repair_cnt IS 'Completed repairs started in the window; MTTR weight';
 
 -- ----------------------------------------------------------------------------
 -- [4. Indexes]
@@ -376,9 +388,9 @@ CREATE INDEX IF NOT EXISTS idx_maint_his_equip_start ON maint_his (equip_id, sta
 -- shift_map: lookups by date, worker
 CREATE INDEX IF NOT EXISTS idx_shift_map_work_date ON shift_map (work_date);
 CREATE INDEX IF NOT EXISTS idx_shift_map_worker ON shift_map (worker_id);
--- kpi_sum: aggregates by date, equipment, work order
-CREATE INDEX IF NOT EXISTS idx_kpi_sum_calc_date ON kpi_sum (calc_date);
-CREATE INDEX IF NOT EXISTS idx_kpi_sum_equip ON kpi_sum (equip_id);
+-- kpi_sum: date range by line (roll-up, day delete), equipment over dates, work order
+CREATE INDEX IF NOT EXISTS idx_kpi_sum_date_line ON kpi_sum (calc_date, line_id);
+CREATE INDEX IF NOT EXISTS idx_kpi_sum_equip_date ON kpi_sum (equip_id, calc_date);
 CREATE INDEX IF NOT EXISTS idx_kpi_sum_work_order ON kpi_sum (work_order_id);
 
 -- ----------------------------------------------------------------------------
@@ -393,3 +405,51 @@ ALTER TABLE measurement SET (
 );
 SELECT add_compression_policy('measurement', INTERVAL '3 days', if_not_exists => TRUE);
 SELECT add_retention_policy('measurement', INTERVAL '1 month', if_not_exists => TRUE);
+
+-- ----------------------------------------------------------------------------
+-- [6. Continuous aggregates]
+-- ----------------------------------------------------------------------------
+-- Hourly roll-ups for KPI (fn_kpi_sum_calc(date, true)) and trend endpoints
+-- (/prod_his/hourly, /status_his/hourly). Real-time (materialized_only = false): buckets newer
+-- than the last refresh are aggregated from raw rows at query time. The policy re-materializes
+-- the last 7 days every 15 minutes; for older changes (backfill, master-data fixes) run
+--   CALL refresh_continuous_aggregate('prod_his_hourly', '<from>', '<to>');
+
+-- prod_his per equip and hour
+CREATE MATERIALIZED VIEW IF NOT EXISTS prod_his_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', time) AS bucket,
+       equip_id,
+       sum(total_cnt) AS total_cnt,
+       sum(good_cnt) AS good_cnt,
+       sum(defect_cnt) AS defect_cnt,
+       count(*) AS row_cnt
+FROM prod_his
+GROUP BY bucket, equip_id
+WITH NO DATA;
+SELECT add_continuous_aggregate_policy('prod_his_hourly',
+    start_offset => INTERVAL '7 days', end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '15 minutes', if_not_exists => TRUE);
+
+-- status_his per equip, status and hour of segment start. dur_sec sums the in-hour part of closed
+-- segments (clipped at the end of the bucket), so it never exceeds 3600. A continuous aggregate
+-- cannot emit one segment into several buckets: the part past the hour ends at max_end (status
+-- segments of one equip do not overlap, so at most one per bucket runs past it) and readers split
+-- it per hour themselves. open_cnt counts segments still open.
+CREATE MATERIALIZED VIEW IF NOT EXISTS status_his_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', start_time) AS bucket,
+       equip_id,
+       status_code,
+       sum(EXTRACT(EPOCH FROM (
+         LEAST(end_time, time_bucket(INTERVAL '1 hour', start_time) + INTERVAL '1 hour') - start_time
+       ))) FILTER (WHERE end_time IS NOT NULL) AS dur_sec,
+       count(*) AS seg_cnt,
+       count(*) FILTER (WHERE end_time IS NULL) AS open_cnt,
+       max(end_time) AS max_end
+FROM status_his
+GROUP BY bucket, equip_id, status_code
+WITH NO DATA;
+SELECT add_continuous_aggregate_policy('status_his_hourly',
+    start_offset => INTERVAL '7 days', end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '15 minutes', if_not_exists => TRUE);
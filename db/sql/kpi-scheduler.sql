@@ -7,6 +7,7 @@
 -- RECOMMENDED: Use host cron (no pg_cron needed)
 --   Crontab: use POSTGRES_USER, POSTGRES_DB from .env (or source .env in cron).
 --     0 1 * * * docker exec hmi-db-postgres psql -U admin -d edge_hmi -c "SELECT fn_kpi_sum_calc(CURRENT_DATE - 1);"
+--     * * * * * docker exec hmi-db-postgres psql -U admin -d edge_hmi -c "SELECT fn_kpi_sum_calc_incremental();"
 --
 -- OPTIONAL: pg_cron (if available in image)
 --   Requires: shared_preload_libraries = 'pg_cron' in postgresql.conf
@@ -17,7 +18,470 @@
 -- ----------------------------------------------------------------------------
 -- [1. KPI calculation function]
 -- ----------------------------------------------------------------------------
-CREATE OR REPLACE FUNCTION fn_kpi_sum_calc(p_calc_date DATE)
+-- Roll-up weight columns and composite indexes of kpi_sum. init-db.sql creates them on a new
+-- database; repeated here so re-running this file upgrades an existing one.
+ALTER TABLE kpi_sum
+  ADD COLUMN IF NOT EXISTS planned_sec FLOAT,
+  ADD COLUMN IF NOT EXISTS run_sec FLOAT,
+  ADD COLUMN IF NOT EXISTS total_cnt INTEGER,
+  ADD COLUMN IF NOT EXISTS good_cnt INTEGER,
+  ADD COLUMN IF NOT EXISTS failure_cnt INTEGER,
+  ADD COLUMN IF NOT EXISTS repair_cnt INTEGER;
+DROP INDEX IF EXISTS idx_kpi_sum_calc_date;
+DROP INDEX IF EXISTS idx_kpi_sum_equip;
+CREATE INDEX IF NOT EXISTS idx_kpi_sum_date_line ON kpi_sum (calc_date, line_id);
+CREATE INDEX IF NOT EXISTS idx_kpi_sum_equip_date ON kpi_sum (equip_id, calc_date);
+
+-- Shift window of calc_date: [date + start_time, date + end_time), +1 day if the shift crosses midnight.
+CREATE OR REPLACE FUNCTION fn_kpi_shift_window(p_calc_date DATE, p_start TIME, p_end TIME)
+RETURNS TABLE (win_start TIMESTAMPTZ, win_end TIMESTAMPTZ)
+LANGUAGE sql STABLE
+AS $$
+  SELECT (p_calc_date + p_start)::timestamptz,
+         (p_calc_date + p_end)::timestamptz
+           + CASE WHEN p_end <= p_start THEN INTERVAL '1 day' ELSE INTERVAL '0' END;
+$$;
+
+-- Set-based: one grouped query per source table for all requested (calc_date, shift_def_id, equip_id)
+-- keys, instead of 5 queries per (shift, line, equip) group. Same formulas and rounding as
+-- fn_kpi_sum_calc_loop (below), so kpi_sum rows are identical. Inserts only; callers delete first.
+--   win   : shift window per key; shared by every line_id of that equip in shift_map
+--   run   : status_his 'Run' seconds overlapping the window
+--   prod  : prod_his total/good in window
+--   maint : MTTR (avg repair minutes, maint_his started in window)
+--   alarm : failure count (alarm_his in window)
+--   wo    : work order with the most output in the window (raw prod_his, also with p_use_cagg);
+--           a label for the whole row, counts are not split by work order
+-- Besides the ratios, each row stores its weights (planned/run seconds, counts) for roll-ups.
+-- p_use_cagg: read full hours [hour_start, hour_end) of each window from the continuous aggregates
+-- prod_his_hourly / status_his_hourly and only the partial-hour edges (and status hours with
+-- segments open or running past the end of their hour) from raw rows. Status look-back reaches
+-- 7 days before the window, so a Run segment longer than that is missed. Sums stay numeric until
+-- the final cast, so results equal the raw path as long as the aggregates are refreshed over the range.
+DROP FUNCTION IF EXISTS fn_kpi_sum_insert(DATE[], INT[], INT[]);
+CREATE OR REPLACE FUNCTION fn_kpi_sum_insert(
+  p_calc_dates DATE[], p_shift_ids INT[], p_equip_ids INT[], p_use_cagg BOOLEAN DEFAULT false
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path TO core, public
+AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  INSERT INTO kpi_sum (
+    calc_date, shift_def_id, line_id, equip_id, work_order_id,
+    availability, performance, quality, oee, mttr, mtbf, uph,
+    planned_sec, run_sec, total_cnt, good_cnt, failure_cnt, repair_cnt
+  )
+  WITH grp AS (
+    SELECT DISTINCT sm.work_date AS calc_date, sm.shift_def_id, sm.line_id, sm.equip_id
+    FROM unnest(p_calc_dates, p_shift_ids, p_equip_ids) AS k(calc_date, shift_def_id, equip_id)
+    JOIN shift_map sm
+      ON sm.work_date = k.calc_date AND sm.shift_def_id = k.shift_def_id AND sm.equip_id = k.equip_id
+  ), win AS (
+    SELECT DISTINCT g.calc_date, g.shift_def_id, g.equip_id, w.win_start, w.win_end,
+           EXTRACT(EPOCH FROM (w.win_end - w.win_start))::FLOAT AS planned_sec,
+           h.hour_start, GREATEST(time_bucket(INTERVAL '1 hour', w.win_end), h.hour_start) AS hour_end
+    FROM grp g
+    JOIN shift_cfg sc ON sc.id = g.shift_def_id
+    CROSS JOIN LATERAL fn_kpi_shift_window(g.calc_date, sc.start_time, sc.end_time) w
+    CROSS JOIN LATERAL (
+      SELECT LEAST(w.win_end, time_bucket(INTERVAL '1 hour', w.win_start)
+               + CASE WHEN time_bucket(INTERVAL '1 hour', w.win_start) < w.win_start
+                      THEN INTERVAL '1 hour' ELSE INTERVAL '0' END) AS hour_start
+    ) h
+  ), rng AS (
+    -- raw prod_his ranges: the whole window, or only the partial-hour edges with p_use_cagg
+    SELECT calc_date, shift_def_id, equip_id, win_start AS lo, win_end AS hi
+    FROM win WHERE NOT p_use_cagg
+    UNION ALL
+    SELECT w.calc_date, w.shift_def_id, w.equip_id, e.lo, e.hi
+    FROM win w
+    CROSS JOIN LATERAL (VALUES (w.win_start, w.hour_start), (w.hour_end, w.win_end)) e(lo, hi)
+    WHERE p_use_cagg AND e.lo < e.hi
+  ), run AS (
+    SELECT calc_date, shift_def_id, equip_id, SUM(sec)::FLOAT AS run_sec
+    FROM (
+      SELECT w.calc_date, w.shift_def_id, w.equip_id,
+             EXTRACT(EPOCH FROM (
+               LEAST(COALESCE(sh.end_time, w.win_end), w.win_end) -
+               GREATEST(sh.start_time, w.win_start)
+             )) AS sec
+      FROM win w
+      JOIN status_his sh
+        ON sh.equip_id = w.equip_id
+       AND sh.status_code = 'Run'
+       AND sh.start_time < w.win_end
+       AND (sh.end_time IS NULL OR sh.end_time > w.win_start)
+      WHERE NOT p_use_cagg
+      UNION ALL
+      -- cagg: full hours whose Run segments all closed inside that hour
+      SELECT w.calc_date, w.shift_def_id, w.equip_id, c.dur_sec
+      FROM win w
+      JOIN status_his_hourly c
+        ON c.equip_id = w.equip_id
+       AND c.status_code = 'Run'
+       AND c.bucket >= w.hour_start AND c.bucket < w.hour_end
+       AND c.open_cnt = 0 AND c.max_end <= c.bucket + INTERVAL '1 hour'
+      WHERE p_use_cagg
+      UNION ALL
+      -- cagg: raw segments of the other hours before hour_end that can overlap the window
+      -- (earlier hours with a segment open or ending after win_start; full hours with a segment
+      -- open or running past the hour)
+      SELECT w.calc_date, w.shift_def_id, w.equip_id,
+             EXTRACT(EPOCH FROM (
+               LEAST(COALESCE(sh.end_time, w.win_end), w.win_end) -
+               GREATEST(sh.start_time, w.win_start)
+             ))
+      FROM win w
+      JOIN status_his_hourly c
+        ON c.equip_id = w.equip_id
+       AND c.status_code = 'Run'
+       AND c.bucket >= w.win_start - INTERVAL '7 days' AND c.bucket < w.hour_end
+       AND (c.open_cnt > 0 OR c.max_end > CASE WHEN c.bucket < w.hour_start THEN w.win_start
+                                               ELSE c.bucket + INTERVAL '1 hour' END)
+      JOIN status_his sh
+        ON sh.equip_id = w.equip_id
+       AND sh.status_code = 'Run'
+       AND sh.start_time >= c.bucket AND sh.start_time < c.bucket + INTERVAL '1 hour'
+       AND sh.start_time < w.win_end
+       AND (sh.end_time IS NULL OR sh.end_time > w.win_start)
+      WHERE p_use_cagg
+      UNION ALL
+      -- cagg: raw segments starting in the trailing partial hour
+      SELECT w.calc_date, w.shift_def_id, w.equip_id,
+             EXTRACT(EPOCH FROM (
+               LEAST(COALESCE(sh.end_time, w.win_end), w.win_end) -
+               GREATEST(sh.start_time, w.win_start)
+             ))
+      FROM win w
+      JOIN status_his sh
+        ON sh.equip_id = w.equip_id
+       AND sh.status_code = 'Run'
+       AND sh.start_time >= w.hour_end AND sh.start_time < w.win_end
+      WHERE p_use_cagg
+    ) x
+    GROUP BY calc_date, shift_def_id, equip_id
+  ), prod AS (
+    SELECT calc_date, shift_def_id, equip_id,
+           SUM(total_cnt)::INT AS total_cnt, SUM(good_cnt)::INT AS good_cnt
+    FROM (
+      SELECT r.calc_date, r.shift_def_id, r.equip_id, ph.total_cnt, ph.good_cnt
+      FROM rng r
+      JOIN prod_his ph
+        ON ph.equip_id = r.equip_id
+       AND ph.time >= r.lo AND ph.time < r.hi
+      UNION ALL
+      SELECT w.calc_date, w.shift_def_id, w.equip_id, c.total_cnt, c.good_cnt
+      FROM win w
+      JOIN prod_his_hourly c
+        ON c.equip_id = w.equip_id
+       AND c.bucket >= w.hour_start AND c.bucket < w.hour_end
+      WHERE p_use_cagg
+    ) x
+    GROUP BY calc_date, shift_def_id, equip_id
+  ), maint AS (
+    SELECT w.calc_date, w.shift_def_id, w.equip_id,
+           AVG(EXTRACT(EPOCH FROM (mh.end_time - mh.start_time)) / 60.0)::FLOAT AS mttr,
+           COUNT(*) AS repair_cnt
+    FROM win w
+    JOIN maint_his mh
+      ON mh.equip_id = w.equip_id
+     AND mh.start_time >= w.win_start AND mh.start_time < w.win_end
+     AND mh.end_time IS NOT NULL
+    GROUP BY w.calc_date, w.shift_def_id, w.equip_id
+  ), alarm AS (
+    SELECT w.calc_date, w.shift_def_id, w.equip_id, COUNT(*) AS failure_cnt
+    FROM win w
+    JOIN alarm_his ah
+      ON ah.equip_id = w.equip_id
+     AND ah.time >= w.win_start AND ah.time < w.win_end
+    GROUP BY w.calc_date, w.shift_def_id, w.equip_id
+  ), wo AS (
+    SELECT DISTINCT ON (w.calc_date, w.shift_def_id, w.equip_id)
+           w.calc_date, w.shift_def_id, w.equip_id, ph.work_order_id
+    FROM win w
+    JOIN prod_his ph
+      ON ph.equip_id = w.equip_id
+     AND ph.time >= w.win_start AND ph.time < w.win_end
+     AND ph.work_order_id IS NOT NULL
+    GROUP BY w.calc_date, w.shift_def_id, w.equip_id, ph.work_order_id
+    ORDER BY w.calc_date, w.shift_def_id, w.equip_id, SUM(COALESCE(ph.total_cnt, 0)) DESC, ph.work_order_id
+  ), src AS (
+    SELECT w.calc_date, w.shift_def_id, w.equip_id, w.planned_sec,
+           COALESCE(r.run_sec, 0) AS run_sec,
+           COALESCE(p.total_cnt, 0) AS total_cnt,
+           COALESCE(p.good_cnt, 0) AS good_cnt,
+           kc.std_cycle_time AS std_ct,
+           m.mttr,
+           COALESCE(m.repair_cnt, 0) AS repair_cnt,
+           COALESCE(a.failure_cnt, 0) AS failure_cnt,
+           o.work_order_id
+    FROM win w
+    LEFT JOIN run r USING (calc_date, shift_def_id, equip_id)
+    LEFT JOIN prod p USING (calc_date, shift_def_id, equip_id)
+    LEFT JOIN maint m USING (calc_date, shift_def_id, equip_id)
+    LEFT JOIN alarm a USING (calc_date, shift_def_id, equip_id)
+    LEFT JOIN wo o USING (calc_date, shift_def_id, equip_id)
+    LEFT JOIN kpi_cfg kc ON kc.equip_id = w.equip_id
+  ), k AS (
+    SELECT src.*,
+           CASE WHEN planned_sec > 0 THEN LEAST(1.0, run_sec / planned_sec) ELSE 0 END AS avail,
+           CASE WHEN run_sec > 0 AND std_ct IS NOT NULL AND std_ct > 0
+                THEN LEAST(1.0, (total_cnt::FLOAT * std_ct) / run_sec) ELSE 0 END AS perf,
+           CASE WHEN total_cnt > 0 THEN good_cnt::FLOAT / total_cnt ELSE 0 END AS qual
+    FROM src
+  )
+  SELECT g.calc_date, g.shift_def_id, g.line_id, g.equip_id, k.work_order_id,
+         k.avail, k.perf, k.qual, k.avail * k.perf * k.qual,
+         k.mttr,
+         CASE WHEN k.run_sec > 0 AND k.failure_cnt > 0 THEN (k.run_sec / 3600.0) / k.failure_cnt::FLOAT END,
+         CASE WHEN k.planned_sec > 0 THEN k.good_cnt::FLOAT * 3600.0 / k.planned_sec END,
+         k.planned_sec, k.run_sec, k.total_cnt, k.good_cnt, k.failure_cnt, k.repair_cnt
+  FROM grp g
+  JOIN k USING (calc_date, shift_def_id, equip_id);
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+
+COMMENT ON FUNCTION fn_kpi_sum_insert(DATE[], INT[], INT[], BOOLEAN) IS 'Insert kpi_sum rows for the given (calc_date, shift_def_id, equip_id) keys (parallel arrays). Does not delete. p_use_cagg: read full hours from prod_his_hourly / status_his_hourly.';
+
+-- Per-date transaction-level advisory locks, taken in date order. Every writer that deletes kpi_sum
+-- rows takes them first, so concurrent day runs (backfill workers, nightly, incremental) on the
+-- same date queue up instead of interleaving row locks, and different dates never wait on each other.
+CREATE OR REPLACE FUNCTION fn_kpi_lock_dates(p_dates DATE[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  d DATE;
+BEGIN
+  FOR d IN SELECT DISTINCT x FROM unnest(p_dates) x ORDER BY x LOOP
+    PERFORM pg_advisory_xact_lock(hashtext('kpi_sum'), d - DATE '2000-01-01');
+  END LOOP;
+END;
+$$;
+
+-- p_use_cagg: see fn_kpi_sum_insert. The nightly job reads raw rows (default); use true for
+-- backfills over ranges the continuous aggregates have already materialized.
+DROP FUNCTION IF EXISTS fn_kpi_sum_calc(DATE);
+CREATE OR REPLACE FUNCTION fn_kpi_sum_calc(p_calc_date DATE, p_use_cagg BOOLEAN DEFAULT false)
+RETURNS void
+LANGUAGE plpgsql
+SET search_path TO core, public
+AS $$
+DECLARE
+  v_shifts INT[];
+  v_equips INT[];
+BEGIN
+  PERFORM fn_kpi_lock_dates(ARRAY[p_calc_date]);
+  DELETE FROM kpi_sum WHERE calc_date = p_calc_date;
+
+  SELECT array_agg(shift_def_id), array_agg(equip_id) INTO v_shifts, v_equips
+  FROM (
+    SELECT DISTINCT sm.shift_def_id, sm.equip_id
+    FROM shift_map sm
+    WHERE sm.work_date = p_calc_date AND sm.equip_id IS NOT NULL
+  ) g;
+
+  IF v_shifts IS NOT NULL THEN
+    PERFORM fn_kpi_sum_insert(array_fill(p_calc_date, ARRAY[cardinality(v_shifts)]), v_shifts, v_equips, p_use_cagg);
+  END IF;
+END;
+$$;
+
+COMMENT ON FUNCTION fn_kpi_sum_calc(DATE, BOOLEAN) IS 'Compute KPI (availability, performance, quality, OEE, MTTR, MTBF, UPH) per shift/line/equip for given date and upsert into kpi_sum.';
+
+-- ----------------------------------------------------------------------------
+-- [1a. Incremental (intraday) recalculation]
+-- ----------------------------------------------------------------------------
+-- Dirty set: row triggers on status_his / prod_his / alarm_his / maint_his / shift_map record the
+-- touched time range per equip in kpi_dirty. Append-only (plain INSERT, no key): writers never
+-- lock or wait on each other's dirty rows, nor on the job's DELETE. The job collapses duplicates.
+-- Row-level, since hypertables do not support statement triggers with transition tables.
+-- The source table is passed as trigger argument: TimescaleDB fires row triggers on the chunk,
+-- so TG_TABLE_NAME is '_hyper_N_M_chunk' for status_his / prod_his / alarm_his / maint_his.
+-- fn_kpi_sum_calc_incremental() takes the dirty rows, finds the (calc_date, shift, equip) windows
+-- they overlap, plus windows that started since the previous run (so a new shift shows up before
+-- its first event), and recomputes only those groups. Scheduled every minute (pg_cron, below).
+CREATE TABLE IF NOT EXISTS kpi_dirty (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    equip_id INTEGER NOT NULL,
+    from_time TIMESTAMPTZ NOT NULL,
+    to_time TIMESTAMPTZ NOT NULL
+);
+-- Upgrade from the one-row-per-equip layout (PRIMARY KEY (equip_id)), keeping pending rows.
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = 'kpi_dirty'::regclass AND attname = 'id' AND NOT attisdropped) THEN
+    ALTER TABLE kpi_dirty DROP CONSTRAINT kpi_dirty_pkey;
+    ALTER TABLE kpi_dirty ADD COLUMN id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY;
+  END IF;
+END $$;
+COMMENT ON TABLE kpi_dirty IS 'KPI dirty log (append-only): source time ranges changed since the last incremental run, one row per changed source row';
+COMMENT ON COLUMN kpi_dirty.to_time IS 'Inclusive; infinity for an open status_his segment';
+
+CREATE TABLE IF NOT EXISTS kpi_calc_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    incremental_at TIMESTAMPTZ
+);
+COMMENT ON TABLE kpi_calc_state IS 'Single row: watermark of the last fn_kpi_sum_calc_incremental run';
+INSERT INTO kpi_calc_state (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION fn_kpi_mark_dirty()
+RETURNS trigger
+LANGUAGE plpgsql
+SET search_path TO core, public
+AS $$
+DECLARE
+  r RECORD;
+  v_from TIMESTAMPTZ;
+  v_to TIMESTAMPTZ;
+BEGIN
+  FOR i IN 1..2 LOOP
+    IF i = 1 THEN
+      CONTINUE WHEN TG_OP = 'INSERT';
+      r := OLD;
+    ELSE
+      CONTINUE WHEN TG_OP = 'DELETE';
+      r := NEW;
+    END IF;
+    CONTINUE WHEN r.equip_id IS NULL;
+
+    IF TG_ARGV[0] = 'status_his' THEN
+      v_from := r.start_time;
+      v_to := COALESCE(r.end_time, 'infinity');
+    ELSIF TG_ARGV[0] = 'maint_his' THEN
+      v_from := r.start_time;
+      v_to := r.start_time;
+    ELSIF TG_ARGV[0] = 'shift_map' THEN
+      v_from := r.work_date::timestamptz;
+      v_to := (r.work_date + 1)::timestamptz;
+    ELSIF TG_ARGV[0] IN ('prod_his', 'alarm_his') THEN
+      v_from := r.time;
+      v_to := r.time;
+    ELSE
+      RAISE EXCEPTION 'fn_kpi_mark_dirty: unknown source %', TG_ARGV[0];
+    END IF;
+
+    INSERT INTO kpi_dirty (equip_id, from_time, to_time) VALUES (r.equip_id, v_from, v_to);
+  END LOOP;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_kpi_dirty ON status_his;
+CREATE TRIGGER trg_kpi_dirty AFTER INSERT OR UPDATE OR DELETE ON status_his
+  FOR EACH ROW EXECUTE FUNCTION fn_kpi_mark_dirty('status_his');
+DROP TRIGGER IF EXISTS trg_kpi_dirty ON prod_his;
+CREATE TRIGGER trg_kpi_dirty AFTER INSERT OR UPDATE OR DELETE ON prod_his
+  FOR EACH ROW EXECUTE FUNCTION fn_kpi_mark_dirty('prod_his');
+DROP TRIGGER IF EXISTS trg_kpi_dirty ON alarm_his;
+CREATE TRIGGER trg_kpi_dirty AFTER INSERT OR UPDATE OR DELETE ON alarm_his
+  FOR EACH ROW EXECUTE FUNCTION fn_kpi_mark_dirty('alarm_his');
+DROP TRIGGER IF EXISTS trg_kpi_dirty ON maint_his;
+CREATE TRIGGER trg_kpi_dirty AFTER INSERT OR UPDATE OR DELETE ON maint_his
+  FOR EACH ROW EXECUTE FUNCTION fn_kpi_mark_dirty('maint_his');
+DROP TRIGGER IF EXISTS trg_kpi_dirty ON shift_map;
+CREATE TRIGGER trg_kpi_dirty AFTER INSERT OR UPDATE OR DELETE ON shift_map
+  FOR EACH ROW EXECUTE FUNCTION fn_kpi_mark_dirty('shift_map');
+
+-- Returns the number of (calc_date, shift_def_id, equip_id) groups recomputed (0 if another run holds the lock).
+-- Claims every committed dirty row (rows of in-flight writers are not visible yet and stay for the
+-- next run) and collapses them to one range per equip and calendar day, so a backdated correction
+-- and live ingest recompute their own days only, not every shift in between. Writers only ever
+-- INSERT into kpi_dirty, so the claim never waits on, or blocks, ingest transactions.
+CREATE OR REPLACE FUNCTION fn_kpi_sum_calc_incremental()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path TO core, public
+AS $$
+DECLARE
+  v_now TIMESTAMPTZ := now();
+  v_last TIMESTAMPTZ;
+  v_dates DATE[];
+  v_shifts INT[];
+  v_equips INT[];
+BEGIN
+  IF NOT pg_try_advisory_xact_lock(hashtext('fn_kpi_sum_calc_incremental')) THEN
+    RETURN 0;
+  END IF;
+  SELECT incremental_at INTO v_last FROM kpi_calc_state;
+  v_last := COALESCE(v_last, v_now - INTERVAL '1 day');
+
+  WITH taken AS (
+    DELETE FROM kpi_dirty
+    RETURNING equip_id, from_time, LEAST(to_time, v_now) AS to_time
+  ), claimed AS (
+    SELECT t.equip_id,
+           min(GREATEST(t.from_time, d.day)) AS from_time,
+           max(LEAST(t.to_time, d.day + INTERVAL '1 day')) AS to_time
+    FROM taken t
+    CROSS JOIN LATERAL generate_series(t.from_time::date, t.to_time::date, INTERVAL '1 day') d(day)
+    GROUP BY t.equip_id, d.day
+  ), touched AS (
+    SELECT DISTINCT d.day::date AS calc_date, sc.id AS shift_def_id, t.equip_id
+    FROM claimed t
+    CROSS JOIN LATERAL generate_series(t.from_time::date - 1, t.to_time::date, INTERVAL '1 day') d(day)
+    CROSS JOIN shift_cfg sc
+    CROSS JOIN LATERAL fn_kpi_shift_window(d.day::date, sc.start_time, sc.end_time) w
+    WHERE w.win_start <= t.to_time AND w.win_end > t.from_time
+  ), started AS (
+    SELECT DISTINCT sm.work_date AS calc_date, sm.shift_def_id, sm.equip_id
+    FROM shift_map sm
+    JOIN shift_cfg sc ON sc.id = sm.shift_def_id
+    CROSS JOIN LATERAL fn_kpi_shift_window(sm.work_date, sc.start_time, sc.end_time) w
+    WHERE sm.work_date BETWEEN v_last::date - 1 AND v_now::date
+      AND sm.equip_id IS NOT NULL
+      AND w.win_start > v_last AND w.win_start <= v_now
+  ), keys AS (
+    SELECT * FROM touched
+    UNION
+    SELECT * FROM started
+  )
+  SELECT array_agg(calc_date), array_agg(shift_def_id), array_agg(equip_id)
+  INTO v_dates, v_shifts, v_equips
+  FROM keys;
+
+  IF v_dates IS NOT NULL THEN
+    PERFORM fn_kpi_lock_dates(v_dates);
+    DELETE FROM kpi_sum ks
+    USING unnest(v_dates, v_shifts, v_equips) AS k(calc_date, shift_def_id, equip_id)
+    WHERE ks.calc_date = k.calc_date AND ks.shift_def_id = k.shift_def_id AND ks.equip_id = k.equip_id;
+    PERFORM fn_kpi_sum_insert(v_dates, v_shifts, v_equips);
+  END IF;
+
+  UPDATE kpi_calc_state SET incremental_at = v_now;
+  RETURN COALESCE(cardinality(v_dates), 0);
+END;
+$$;
+
+COMMENT ON FUNCTION fn_kpi_sum_calc_incremental() IS 'Recompute kpi_sum only for (calc_date, shift, equip) groups whose source rows changed (kpi_dirty) or whose shift started since the last run.';
+
+-- ----------------------------------------------------------------------------
+-- [1b. Backfill log]
+-- ----------------------------------------------------------------------------
+-- api/scripts/kpi_backfill.py runs fn_kpi_sum_calc per day in parallel and records each finished
+-- day here in the same transaction, so a rerun with the same run_id skips the days already done.
+CREATE TABLE IF NOT EXISTS kpi_backfill_log (
+    run_id VARCHAR(100) NOT NULL,
+    calc_date DATE NOT NULL,
+    row_cnt INTEGER NOT NULL,
+    elapsed_sec FLOAT NOT NULL,
+    done_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, calc_date)
+);
+COMMENT ON TABLE kpi_backfill_log IS 'KPI backfill progress: one row per (run, calc_date) recalculated';
+
+-- ----------------------------------------------------------------------------
+-- [1c. Reference implementation (row-by-row loop)]
+-- ----------------------------------------------------------------------------
+-- Original per-(shift, line, equip) loop: 5 aggregate queries per group.
+-- Kept for parity checks / benchmarks (api/scripts/bench_kpi.py). Not scheduled.
+CREATE OR REPLACE FUNCTION fn_kpi_sum_calc_loop(p_calc_date DATE)
 RETURNS void
 LANGUAGE plpgsql
 SET search_path TO core, public
@@ -39,7 +503,10 @@ DECLARE
   mttr_sec FLOAT;
   mtbf_hr FLOAT;
   failure_cnt BIGINT;
+  repair_cnt BIGINT;
+  wo_id INT;
 BEGIN
+  PERFORM fn_kpi_lock_dates(ARRAY[p_calc_date]);
   DELETE FROM kpi_sum WHERE calc_date = p_calc_date;
 
   FOR r IN
@@ -97,7 +564,8 @@ BEGIN
     qual := CASE WHEN total_cnt > 0 THEN good_cnt::FLOAT / total_cnt ELSE 0 END;
 
     -- MTTR (avg repair duration in minutes) from maint_his in window
-    SELECT AVG(EXTRACT(EPOCH FROM (mh.end_time - mh.start_time)) / 60.0) INTO mttr_sec
+    SELECT AVG(EXTRACT(EPOCH FROM (mh.end_time - mh.start_time)) / 60.0), COUNT(*)
+    INTO mttr_sec, repair_cnt
     FROM maint_his mh
     WHERE mh.equip_id = r.equip_id
       AND mh.start_time >= win_start AND mh.start_time < win_end
@@ -114,21 +582,33 @@ BEGIN
       mtbf_hr := NULL;
     END IF;
 
+    -- Work order with the most output in window (label only, ties: lowest id)
+    SELECT ph.work_order_id INTO wo_id
+    FROM prod_his ph
+    WHERE ph.equip_id = r.equip_id
+      AND ph.time >= win_start AND ph.time < win_end
+      AND ph.work_order_id IS NOT NULL
+    GROUP BY ph.work_order_id
+    ORDER BY SUM(COALESCE(ph.total_cnt, 0)) DESC, ph.work_order_id
+    LIMIT 1;
+
     -- UPH (Units Per Hour): good_cnt per planned shift hour
     INSERT INTO kpi_sum (
-      calc_date, shift_def_id, line_id, equip_id,
-      availability, performance, quality, oee, mttr, mtbf, uph
+      calc_date, shift_def_id, line_id, equip_id, work_order_id,
+      availability, performance, quality, oee, mttr, mtbf, uph,
+      planned_sec, run_sec, total_cnt, good_cnt, failure_cnt, repair_cnt
     ) VALUES (
-      p_calc_date, r.shift_def_id, r.line_id, r.equip_id,
+      p_calc_date, r.shift_def_id, r.line_id, r.equip_id, wo_id,
       avail, perf, qual, avail * perf * qual,
       mttr_sec, mtbf_hr,
-      CASE WHEN planned_sec > 0 THEN good_cnt::FLOAT * 3600.0 / planned_sec ELSE NULL END
+      CASE WHEN planned_sec > 0 THEN good_cnt::FLOAT * 3600.0 / planned_sec ELSE NULL END,
+      planned_sec, run_sec, total_cnt, good_cnt, failure_cnt, repair_cnt
     );
   END LOOP;
 END;
 $$;
 
-COMMENT ON FUNCTION fn_kpi_sum_calc(DATE) IS 'Compute KPI (availability, performance, quality, OEE, MTTR, MTBF, UPH) per shift/line/equip for given date and upsert into kpi_sum.';
+COMMENT ON FUNCTION fn_kpi_sum_calc_loop(DATE) IS 'Reference (row-by-row) KPI calculation; same kpi_sum rows (ratios, work order, weights) as fn_kpi_sum_calc. For parity checks / benchmarks.';
 
 -- ----------------------------------------------------------------------------
 -- [2. pg_cron extension and schedule]
@@ -140,6 +620,8 @@ DECLARE
     v_jobid BIGINT;
     v_sched text := '0 1 * * *';
     v_cmd   text := 'SELECT core.fn_kpi_sum_calc(CURRENT_DATE - 1)';
+    v_incr_sched text := '* * * * *';
+    v_incr_cmd   text := 'SELECT core.fn_kpi_sum_calc_incremental()';
 BEGIN
     BEGIN
         ALTER TABLE cron.job ADD COLUMN IF NOT EXISTS active boolean NOT NULL DEFAULT true;
@@ -154,6 +636,8 @@ BEGIN
 
     SELECT cron.schedule(v_sched, v_cmd) INTO v_jobid;
     RAISE NOTICE 'pg_cron: KPI daily scheduled (jobid=%).', v_jobid;
+    SELECT cron.schedule(v_incr_sched, v_incr_cmd) INTO v_jobid;
+    RAISE NOTICE 'pg_cron: KPI incremental every minute (jobid=%).', v_jobid;
 EXCEPTION WHEN OTHERS THEN
     RAISE WARNING 'pg_cron registration skipped: %. Use host cron for fn_kpi_sum_calc.', SQLERRM;
 END;
@@ -40,4 +40,7 @@ docker exec -i "${CONTAINER}" psql -U "${USER}" -d "${DB}" -v ON_ERROR_STOP=1 -f
 echo "▶ Running 02-dummy-history.sql..."
 docker exec -i "${CONTAINER}" psql -U "${USER}" -d "${DB}" -v ON_ERROR_STOP=1 -f - < sql/02-dummy-history.sql
 
+echo "▶ Running 03-check-kpi-dirty.sql..."
+docker exec -i "${CONTAINER}" psql -U "${USER}" -d "${DB}" -v ON_ERROR_STOP=1 -f - < sql/03-check-kpi-dirty.sql
+
 echo "✅ Dummy data loaded."
@@ -12,6 +12,13 @@ DELETE FROM maint_his;
 DELETE FROM alarm_his;
 DELETE FROM prod_his;
 DELETE FROM status_his;
+DO $$
+BEGIN
+  -- kpi_dirty exists only once kpi-scheduler.sql has been applied
+  IF to_regclass('kpi_dirty') IS NOT NULL THEN
+    DELETE FROM kpi_dirty;
+  END IF;
+END $$;
 DELETE FROM measurement;
 DELETE FROM kpi_cfg;
 DELETE FROM sensor_mst;
@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Check: kpi_dirty triggers fire on hypertable chunks (run after 01/02, kpi-scheduler.sql applied)
+-- TimescaleDB copies row triggers onto every chunk, so writes to status_his / prod_his run
+-- fn_kpi_mark_dirty on the chunk. Rolled back: leaves no rows behind.
+-- Run from test/: docker exec -i hmi-db-postgres psql -U admin -d edge_hmi -v ON_ERROR_STOP=1 -f - < sql/03-check-kpi-dirty.sql
+-- ============================================================================
+
+SET search_path TO core, public;
+
+BEGIN;
+
+DO $$
+DECLARE
+  v_equip INTEGER;
+  v_chunk REGCLASS;
+  v_cnt BIGINT;
+  v_step BIGINT;
+BEGIN
+  IF to_regclass('kpi_dirty') IS NULL THEN
+    RAISE NOTICE 'kpi_dirty not found (kpi-scheduler.sql not applied), skipped';
+    RETURN;
+  END IF;
+  SELECT id INTO STRICT v_equip FROM equip_mst ORDER BY id LIMIT 1;
+  DELETE FROM kpi_dirty WHERE equip_id = v_equip;
+
+  -- status_his through the hypertable (routed to a chunk)
+  INSERT INTO status_his (equip_id, status_code, start_time, end_time)
+  VALUES (v_equip, 'Run', '2001-01-01 08:00+00', '2001-01-01 09:00+00');
+  SELECT count(*) INTO v_cnt FROM kpi_dirty
+  WHERE equip_id = v_equip AND from_time = '2001-01-01 08:00+00' AND to_time = '2001-01-01 09:00+00';
+  ASSERT v_cnt = 1, 'status_his INSERT did not mark kpi_dirty';
+
+  -- status_his through the chunk table itself: OLD and NEW ranges
+  SELECT c INTO STRICT v_chunk
+  FROM show_chunks('status_his', older_than => '2001-01-02 00:00+00'::timestamptz,
+                   newer_than => '2001-01-01 00:00+00'::timestamptz) c;
+  EXECUTE format('UPDATE %s SET end_time = NULL WHERE equip_id = $1 AND start_time = %L', v_chunk, '2001-01-01 08:00+00')
+  USING v_equip;
+  GET DIAGNOSTICS v_step = ROW_COUNT;
+  ASSERT v_step = 1, 'chunk UPDATE matched no row';
+  SELECT count(*) INTO v_cnt FROM kpi_dirty WHERE equip_id = v_equip AND to_time = 'infinity';
+  ASSERT v_cnt = 1, 'status_his chunk UPDATE did not mark kpi_dirty';
+
+  DELETE FROM status_his WHERE equip_id = v_equip AND start_time = '2001-01-01 08:00+00';
+  SELECT count(*) INTO v_cnt FROM kpi_dirty WHERE equip_id = v_equip;
+  ASSERT v_cnt = 4, format('expected 4 kpi_dirty rows after INSERT/UPDATE/DELETE, got %s', v_cnt);
+
+  -- prod_his (time column)
+  INSERT INTO prod_his (time, equip_id, total_cnt, good_cnt) VALUES ('2001-01-01 08:30+00', v_equip, 1, 1);
+  SELECT count(*) INTO v_cnt FROM kpi_dirty
+  WHERE equip_id = v_equip AND from_time = '2001-01-01 08:30+00' AND to_time = '2001-01-01 08:30+00';
+  ASSERT v_cnt = 1, 'prod_his INSERT did not mark kpi_dirty';
+
+  RAISE NOTICE 'kpi_dirty triggers OK';
+END $$;
+
+ROLLBACK;